@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Registry
+
+
+class BackendUnavailable(Exception):
+    """The /generate/ backend could not produce a result (error, timeout or open circuit)."""
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    While open every call is refused until ``reset_timeout`` has passed, then
+    a single trial call is let through (half-open): success closes the
+    circuit again, failure re-opens it, and a trial that never reached the
+    backend is handed back with ``release``.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def release(self):
+        # The reset timeout has already passed, so the next allow() is the new trial
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class BackendClient:
+    """Client for the LLM /generate/ redaction backend.
+
+    Keeps a pool of keep-alive connections, bounds every request with
+    connect/read timeouts, caps the number of requests in flight, retries
+    transient failures with jittered exponential backoff and stops calling
+    a failing backend through a CircuitBreaker.  Every failure surfaces as
+    BackendUnavailable so the caller can fall back to local redaction.
+
+    HTTP latency and failures go to ``metrics`` (a metrics.Registry).
+    """
+
+    def __init__(self, url, connect_timeout=0.5, read_timeout=2.0, max_connections=32,
+                 max_in_flight=32, acquire_timeout=0.5, retries=2, backoff=0.05, breaker=None, metrics=None):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.acquire_timeout = acquire_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        registry = metrics if metrics is not None else Registry()
+        self.request_seconds = registry.histogram(
+            'redaction_stage_seconds', 'Time spent in each redaction stage', stage='backend')
+        self.errors = registry.counter('backend_errors', 'Backend calls that failed or were refused')
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def generate(self, prompt, max_tokens=32, temperature=0.2):
+        return self.post({"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature})
+
+    def generate_batch(self, prompts, max_tokens=32, temperature=0.2):
+        # One result per prompt, in the same order
+        return self.post({"prompts": prompts, "max_tokens": max_tokens, "temperature": temperature})
+
+    def post(self, payload):
+        if not self.breaker.allow():
+            self.errors.inc()
+            raise BackendUnavailable('circuit open')
+        # Every way out settles the breaker, so a trial call cannot leave it half-open
+        sent = succeeded = False
+        try:
+            if not self._in_flight.acquire(timeout=self.acquire_timeout):
+                raise BackendUnavailable('too many requests in flight')
+            sent = True
+            try:
+                result = self._post_with_retries(payload)
+            finally:
+                self._in_flight.release()
+            succeeded = True
+            return result
+        finally:
+            if succeeded:
+                self.breaker.record_success()
+            else:
+                self.errors.inc()
+                if sent:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release()
+
+    def _post_with_retries(self, payload):
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+                error = BackendUnavailable(f'backend returned {response.status_code}')
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = BackendUnavailable(str(exc))
+            except (requests.HTTPError, ValueError) as exc:
+                # 4xx and malformed bodies will not get better by retrying
+                raise BackendUnavailable(str(exc)) from exc
+            except requests.RequestException as exc:
+                # A body cut off mid-stream and the like
+                error = BackendUnavailable(str(exc))
+            finally:
+                self.request_seconds.since(start)
+
+            if attempt < self.retries:
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise error
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,75 @@
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``; starts full."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'clock')
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        # Seconds to wait before the token just taken may be used; 0 if now
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class InboundQueue:
+    """Final transcripts of one socket waiting to be redacted.
+
+    At most ``max_pending`` utterances wait; while ``draining``, one handler
+    works through them and the others only ``put`` and return.  ``take``
+    coalesces everything queued (up to ``max_chars``) into one utterance, so
+    a speaker who bursts costs one pipeline run and one backend call per
+    token rather than one per event.  ``put`` returns False when the queue
+    is full, i.e. the client sends faster than ``rate`` for longer than its
+    burst and the queue allow.
+    """
+
+    __slots__ = ('pending', 'max_pending', 'max_chars', 'bucket', 'draining', 'overloaded', 'dropped',
+                 'last_seen')
+
+    def __init__(self, now=0.0, rate=5.0, burst=10, max_pending=8, max_chars=2000, clock=time.monotonic):
+        self.pending = deque()
+        self.max_pending = max_pending
+        self.max_chars = max_chars
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.draining = False
+        # Set once a put was refused, until one finds the queue idle again
+        self.overloaded = False
+        self.dropped = 0
+        self.last_seen = now
+
+    def put(self, text):
+        if not self.pending and not self.draining:
+            # Caught up with the sender
+            self.overloaded = False
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            self.overloaded = True
+            return False
+        self.pending.append(text)
+        return True
+
+    def take(self):
+        texts = [self.pending.popleft()]
+        size = len(texts[0])
+        while self.pending and size + 1 + len(self.pending[0]) <= self.max_chars:
+            texts.append(self.pending.popleft())
+            size += 1 + len(texts[-1])
+        return ' '.join(texts)
+
+    def __len__(self):
+        return len(self.pending)
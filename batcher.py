@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from backend_client import BackendUnavailable
+
+
+class MicroBatcher:
+    """Coalesces concurrent backend requests into batched calls.
+
+    The first item to arrive opens a window of ``window`` seconds; the batch
+    is sent when the window closes or ``max_batch`` items are waiting,
+    whichever comes first.  ``send_batch`` receives the list of items and must
+    return one result per item, in order.  Each caller gets a Future; under
+    gevent the worker and the per-batch senders are greenlets, so a waiting
+    handler only blocks its own greenlet.
+    """
+
+    def __init__(self, send_batch, window=0.015, max_batch=16, max_queue=1024):
+        self.send_batch = send_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.batches_sent = 0
+        self.items_sent = 0
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def submit(self, item):
+        future = Future()
+        with self._cond:
+            if len(self._pending) >= self.max_queue:
+                raise BackendUnavailable('batch queue full')
+            self._pending.append((item, future))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            # Send without holding up the next window
+            threading.Thread(target=self._dispatch, args=(batch,), daemon=True).start()
+
+    def _dispatch(self, batch):
+        self.batches_sent += 1
+        self.items_sent += len(batch)
+        try:
+            results = self.send_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise BackendUnavailable(f'expected {len(batch)} results, got {len(results)}')
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+class BatchingBackend:
+    """Drop-in for BackendClient.generate that goes through a MicroBatcher."""
+
+    def __init__(self, client, window=0.015, max_batch=16, max_queue=1024, wait_timeout=5.0):
+        self.client = client
+        self.wait_timeout = wait_timeout
+        self.batcher = MicroBatcher(client.generate_batch, window, max_batch, max_queue)
+
+    def generate(self, prompt):
+        future = self.batcher.submit(prompt)
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except BackendUnavailable:
+            raise
+        except Exception as exc:
+            raise BackendUnavailable(str(exc)) from exc
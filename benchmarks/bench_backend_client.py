@@ -0,0 +1,53 @@
+"""Exercise BackendClient against the stub backend.
+
+    python benchmarks/bench_backend_client.py
+
+Runs a healthy, a slow, a flaky and a dead backend in turn and reports
+latency percentiles, how many calls failed over to the local path and the
+breaker state at the end of each run.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend_client import BackendClient, BackendUnavailable, CircuitBreaker  # noqa: E402
+from stub_backend import StubBackend  # noqa: E402
+
+PROMPT = [{"role": "customer", "content": "my cvv is 123"}]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(label, calls=200, **stub_options):
+    stub = StubBackend(**stub_options).start()
+    client = BackendClient(stub.url, connect_timeout=0.2, read_timeout=0.25, retries=2, backoff=0.01,
+                           breaker=CircuitBreaker(failure_threshold=5, reset_timeout=0.5))
+    latencies = []
+    fallbacks = 0
+    for _ in range(calls):
+        started = time.perf_counter()
+        try:
+            client.generate(PROMPT)
+        except BackendUnavailable:
+            fallbacks += 1
+        latencies.append(time.perf_counter() - started)
+    client.close()
+    stub.stop()
+    print(f"{label:<10} p50 {percentile(latencies, 50) * 1e3:7.2f} ms  p99 {percentile(latencies, 99) * 1e3:7.2f} ms  "
+          f"fallbacks {fallbacks:>4}/{calls}  backend requests {stub.requests:>4}  breaker {client.breaker.state}")
+
+
+def main():
+    run('healthy')
+    run('slow', latency=0.02)
+    run('flaky', failure_rate=0.2)
+    run('dead', failure_rate=1.0, hang=True, calls=50)
+
+
+if __name__ == '__main__':
+    main()
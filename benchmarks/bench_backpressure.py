@@ -0,0 +1,91 @@
+"""Round-trip tail latency of well-behaved calls while one client floods `text`.
+
+    python benchmarks/bench_backpressure.py [--pairs 50] [--duration 20] [--flood-rate 500]
+
+Starts local_server.py against the stub /generate/ backend, then runs
+loadgen.py's speech-paced clients twice: alone, and next to one extra
+socket that emits customer utterances with card-like digits (so each goes
+through the local redactor and the backend) at --flood-rate per second.  Prints the
+well-behaved round trip percentiles for both runs, plus how many of the
+flood's messages the server answered and whether it was told it is
+'overloaded'.  Needs python-socketio's client and websocket-client.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from loadgen import free_port, start_server, wait_ready  # noqa: E402
+from stub_backend import StubBackend  # noqa: E402
+
+LOADGEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadgen.py')
+
+
+def flood(url, rate, duration):
+    import socketio
+    counts = {'sent': 0, 'answered': 0, 'overloaded': 0}
+    client = socketio.Client(reconnection=False)
+    client.on('redacted_text', lambda data: counts.__setitem__('answered', counts['answered'] + 1))
+    client.on('overloaded', lambda data: counts.__setitem__('overloaded', counts['overloaded'] + 1))
+    client.connect(f'{url}?type=customer&call=flood', transports=['websocket'], wait_timeout=30)
+    started = time.monotonic()
+    while time.monotonic() - started < duration:
+        client.emit('text', {'text': f"my card number is 4111 1111 1111 {counts['sent'] % 10000:04d}"})
+        counts['sent'] += 1
+        time.sleep(max(0.0, started + counts['sent'] / rate - time.monotonic()))
+    time.sleep(1)
+    client.disconnect()
+    return counts
+
+
+def well_behaved(url, pairs, duration):
+    output = subprocess.run(
+        [sys.executable, LOADGEN, '--url', url, '--pairs', str(pairs), '--duration', str(duration),
+         '--procs', '1', '--ramp', '0'],
+        stdout=subprocess.PIPE, check=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--flood-rate', type=float, default=500.0, help='messages per second from the flooder')
+    parser.add_argument('--backend-latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    stub = StubBackend(latency=args.backend_latency).start()
+    port = free_port()
+    server = start_server('local_server', port, stub.url)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(url)
+        quiet = well_behaved(url, args.pairs, args.duration)
+        flooded = {}
+        flooder = threading.Thread(
+            target=lambda: flooded.update(flood(url, args.flood_rate, args.duration)), daemon=True)
+        flooder.start()
+        noisy = well_behaved(url, args.pairs, args.duration)
+        flooder.join()
+    finally:
+        server.terminate()
+        server.wait()
+        stub.stop()
+
+    print(f"{'well-behaved round trip':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'timeouts':>9}")
+    for label, result in (('alone', quiet), (f'with flood ({args.flood_rate:.0f}/s)', noisy)):
+        rtt = result['round_trip']
+        print(f"{label:<26} {rtt['p50_ms']:>8.1f} {rtt['p95_ms']:>8.1f} {rtt['p99_ms']:>8.1f} "
+              f"{rtt['max_ms']:>8.1f} {result['errors']['timeout']:>9}")
+    print(f"flood: {flooded.get('sent', 0)} sent, {flooded.get('answered', 0)} answered, "
+          f"'overloaded' received {flooded.get('overloaded', 0)} time(s)")
+
+
+if __name__ == '__main__':
+    main()
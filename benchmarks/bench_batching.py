@@ -0,0 +1,80 @@
+"""Latency/throughput tradeoff of micro-batching /generate/ calls.
+
+    python benchmarks/bench_batching.py [--clients 32] [--duration 3]
+
+The stub backend handles one request at a time with a fixed cost per
+request plus a smaller cost per prompt, roughly like a single GPU.  Each
+client thread sends one utterance after another; we compare direct calls
+with MicroBatcher at several window sizes.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend_client import BackendClient, BackendUnavailable, CircuitBreaker  # noqa: E402
+from batcher import BatchingBackend  # noqa: E402
+from stub_backend import StubBackend  # noqa: E402
+
+PROMPT = [{"role": "customer", "content": "sure, it is 4 5 6"}]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(label, backend, clients, duration):
+    latencies = []
+    errors = [0]
+    stop_at = time.monotonic() + duration
+
+    def client():
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                backend.generate(PROMPT)
+            except BackendUnavailable:
+                errors[0] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{label:<14} {len(latencies) / duration:>9.0f} {percentile(latencies, 50) * 1e3:>9.1f} "
+          f"{percentile(latencies, 99) * 1e3:>9.1f} {errors[0]:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--request-latency', type=float, default=0.01)
+    parser.add_argument('--item-latency', type=float, default=0.0005)
+    parser.add_argument('--max-batch', type=int, default=32)
+    args = parser.parse_args()
+
+    stub = StubBackend(latency=args.request_latency, item_latency=args.item_latency, serial=True).start()
+
+    def client():
+        return BackendClient(stub.url, read_timeout=10, max_in_flight=args.clients, acquire_timeout=10,
+                             breaker=CircuitBreaker(failure_threshold=10 ** 9))
+
+    print(f"{'mode':<14} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    run('direct', client(), args.clients, args.duration)
+    for window_ms in (5, 10, 25):
+        backend = BatchingBackend(client(), window=window_ms / 1000, max_batch=args.max_batch, wait_timeout=10)
+        run(f'batch {window_ms} ms', backend, args.clients, args.duration)
+        batcher = backend.batcher
+        print(f"{'':<14} mean batch size {batcher.items_sent / max(1, batcher.batches_sent):.1f}")
+    stub.stop()
+
+
+if __name__ == '__main__':
+    main()
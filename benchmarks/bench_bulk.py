@@ -0,0 +1,98 @@
+"""Throughput, memory and resume check for the offline redaction CLI.
+
+    python benchmarks/bench_bulk.py [--calls 2000 20000] [--processes 2]
+
+Writes synthetic gzip JSONL inputs and runs redact_calls.py on each,
+sampling the parent process's RSS while it runs (flat across input sizes
+if nothing is buffered).  Then interrupts a run mid-way, resumes it from
+its checkpoint and checks the output matches an uninterrupted run.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CLI = os.path.join(ROOT, 'redact_calls.py')
+
+AGENT = ["thanks for calling", "can I have the security code on the back of your card", "let me check that",
+         "what are the three digits", "is there anything else"]
+CUSTOMER = ["sure", "it is 4 5 6", "one moment", "the number is 123", "no that is all", "okay"]
+
+
+def write_calls(path, count, seed=9):
+    rng = random.Random(seed)
+    with gzip.open(path, 'wt', encoding='utf-8') as handle:
+        for call in range(count):
+            for timestamp in range(rng.randint(6, 30)):
+                role = rng.choice(('agent', 'customer'))
+                turn = {'call_id': f'call-{call}', 'timestamp': timestamp, 'channel_tag': role,
+                        'transcript': rng.choice(AGENT if role == 'agent' else CUSTOMER)}
+                handle.write(json.dumps(turn) + '\n')
+
+
+def rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+def run(args, stop_after=None):
+    proc = subprocess.Popen([sys.executable, CLI] + args, cwd=ROOT, stderr=subprocess.PIPE, text=True)
+    started = time.monotonic()
+    peak = 0
+    while proc.poll() is None:
+        peak = max(peak, rss_kb(proc.pid))
+        if stop_after is not None and time.monotonic() - started > stop_after:
+            proc.send_signal(signal.SIGINT)
+            proc.wait()
+            break
+        time.sleep(0.05)
+    stderr = proc.stderr.read()
+    return time.monotonic() - started, peak, stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, nargs='+', default=[2000, 20000])
+    parser.add_argument('--processes', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'calls':>8} {'wall s':>8} {'calls/sec':>10} {'parent peak RSS':>16}")
+        for count in args.calls:
+            source = os.path.join(tmp, f'calls-{count}.jsonl.gz')
+            output = os.path.join(tmp, f'out-{count}.jsonl')
+            write_calls(source, count)
+            wall, peak, _ = run([source, '-o', output, '--processes', str(args.processes)])
+            print(f"{count:>8} {wall:>8.1f} {count / wall:>10.0f} {peak / 1024:>13.1f} MB")
+
+        count = args.calls[-1]
+        source = os.path.join(tmp, f'calls-{count}.jsonl.gz')
+        expected = os.path.join(tmp, f'out-{count}.jsonl')
+        resumed = os.path.join(tmp, 'resumed.jsonl')
+        common = ['-o', resumed, '--processes', str(args.processes), '--checkpoint-every', '100']
+        run([source] + common, stop_after=3.0)
+        with open(resumed + '.checkpoint') as handle:
+            checkpoint = json.load(handle)
+        run([source, '--resume'] + common)
+        with open(expected, 'rb') as a, open(resumed, 'rb') as b:
+            same = a.read() == b.read()
+        print(f"resume: interrupted after {checkpoint['calls']} calls, output identical after resume: {same}")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Hit rate and per-lookup cost of RedactionCache on scripted agent lines.
+
+    python benchmarks/bench_cache.py [--utterances 100000]
+
+Replays a stream where most agent lines come from a small script (with
+the usual speech-recognition whitespace noise) and customer lines are
+mostly unique, through a deliberately small cache so eviction kicks in.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cache import RedactionCache  # noqa: E402
+
+SCRIPT = [
+    "can I have the three digits on the back of your card",
+    "thank you for calling, how can I help you today",
+    "could you confirm the email address on the account",
+    "is there anything else I can help you with",
+    "please hold while I check that for you",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--utterances', type=int, default=100000)
+    parser.add_argument('--max-bytes', type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    stream = []
+    for index in range(args.utterances):
+        if rng.random() < 0.6:
+            line = rng.choice(SCRIPT)
+            stream.append(("agent", line + ' ' * rng.randrange(2)))
+        else:
+            stream.append(("customer", f"my reference is {rng.randrange(10 ** 9)} thanks"))
+
+    cache = RedactionCache(max_bytes=args.max_bytes)
+    started = time.perf_counter()
+    for role, text in stream:
+        if cache.get(role, text) is None:
+            cache.put(role, text, text)
+    elapsed = time.perf_counter() - started
+
+    stats = cache.stats()
+    lookups = stats['hits'] + stats['misses']
+    print(f"hit rate {stats['hits'] / lookups:.3f}  entries {stats['entries']}  bytes {stats['bytes']}  "
+          f"evictions {stats['evictions']}  {elapsed / len(stream) * 1e6:.2f} us per lookup(+put)")
+
+
+if __name__ == '__main__':
+    main()
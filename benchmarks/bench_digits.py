@@ -0,0 +1,121 @@
+"""Throughput of digits.scan, and the old per-token number finder next to it.
+
+    python benchmarks/bench_digits.py [--size 65536]
+
+Prints MB/s and utterances/s of digits.scan on plain speech, digit-heavy
+and card-reading corpora, then the time to find the number after a
+trigger with the old spaCy loop (like_num per token plus a time regex
+per token) against CallRedactor.number_span, and how often they agree.
+The second part needs spaCy for the old loop; it only tokenizes, no model
+is loaded.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import digits  # noqa: E402
+
+SPEECH = "so I was wondering whether you could help me with my account today "
+DIGIT_HEAVY = "it is four five six then 1 22 and 3:52pm or double seven "
+CARDS = "the card is 4111 1111 1111 1111 and the code is 123, call 555 867 5309 "
+
+TIME_PATTERN = r"\b(?:[01]?\d|2[0-3]):([0-5]?\d)(?:\d?[][APap][Mm])?\b"
+
+AFTER_TRIGGER = [
+    "it is 123",
+    "four five six",
+    "um let me check, 4 5 6",
+    "it's 3:52 on the back",
+    "the number is 12 and then 34",
+    "nine eight seven six",
+    "I don't have it on me right now, sorry",
+    "4111 1111 1111 1111 and 123",
+    "twenty twenty",
+    "double seven three",
+]
+
+
+def sized(base, size):
+    return (base * (size // len(base) + 1))[:size]
+
+
+def per_call(fn):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def legacy_find_numbers(doc):
+    # The loop CallRedactor_find_numbers_after_match ran over the tokens
+    number_count = 0
+    start_idx = None
+    last_num_end = None
+    found = (None, None)
+    for token in doc:
+        if token.like_num or token.text.isdigit():
+            if number_count == 0:
+                start_idx = token.idx
+            number_count += len(token.text) if token.text.isdigit() else 1
+            last_num_end = token.idx + len(token.text)
+            if number_count >= 3:
+                found = (start_idx, last_num_end)
+        elif number_count > 0 and len(token.text.strip()) > 15:
+            number_count = 0
+            start_idx = None
+        else:
+            for _ in re.finditer(TIME_PATTERN, token.text):
+                found = (token.idx, token.idx + len(token.text))
+    return found
+
+
+def bench_scan(size):
+    corpora = [('speech', SPEECH), ('digit-heavy', DIGIT_HEAVY), ('cards', CARDS)]
+    print(f"{'corpus':<14} {'runs':>6} {'MB/s':>8} {'utterances/s':>14}")
+    for label, base in corpora:
+        text = sized(base, size)
+        runs = len(digits.scan(text))
+        seconds = per_call(lambda: digits.scan(text))
+        utterance_seconds = per_call(lambda: digits.scan(base))
+        print(f"{label:<14} {runs:>6} {len(text) / seconds / 1e6:>8.1f} {1 / utterance_seconds:>14.0f}")
+
+
+def bench_finder():
+    try:
+        from spacy.lang.en import English
+    except ImportError:
+        print("\nspaCy is not installed; skipping the comparison with the old finder")
+        return
+    from call_redactor import CallRedactor
+    nlp = English()
+    redactor = CallRedactor()
+    docs = [nlp(text) for text in AFTER_TRIGGER]
+    legacy = per_call(lambda: [legacy_find_numbers(doc) for doc in docs])
+    tokenized = per_call(lambda: [legacy_find_numbers(nlp(text)) for text in AFTER_TRIGGER])
+    scanned = per_call(lambda: [redactor.number_span(text) for text in AFTER_TRIGGER])
+    agree = sum(legacy_find_numbers(doc) == redactor.number_span(doc.text) for doc in docs)
+    count = len(AFTER_TRIGGER)
+    print(f"\n{'number after a trigger':<36} {'us/utterance':>12}")
+    print(f"{'old loop, Doc already built':<36} {legacy / count * 1e6:>12.1f}")
+    print(f"{'old loop, tokenizing too':<36} {tokenized / count * 1e6:>12.1f}")
+    print(f"{'number_span (digits.scan)':<36} {scanned / count * 1e6:>12.1f}")
+    print(f"same span on {agree} of {count} utterances")
+    for doc in docs:
+        before, after = legacy_find_numbers(doc), redactor.number_span(doc.text)
+        if before != after:
+            print(f"  {doc.text!r}: old {before}, new {after}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=64 * 1024, help="bytes per corpus")
+    args = parser.parse_args()
+    bench_scan(args.size)
+    bench_finder()
+
+
+if __name__ == '__main__':
+    main()
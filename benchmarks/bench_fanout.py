@@ -0,0 +1,63 @@
+"""Fan-out cost of chat_message: global broadcast vs per-call rooms.
+
+    python benchmarks/bench_fanout.py [--sockets 1000] [--messages 200]
+
+Registers simulated sockets (an agent and a customer per call) directly
+with a python-socketio Server whose transport just counts bytes, then
+emits chat_message the way handle_text used to (broadcast, skip sender)
+and the way it does now (to the call's room, skip sender).
+"""
+import argparse
+import time
+
+import socketio
+
+
+class CountingServer(socketio.Server):
+    def __init__(self):
+        super().__init__(async_mode='threading')
+        self.bytes_sent = 0
+        self.packets_sent = 0
+        self.eio.send = self._count
+
+    def _count(self, eio_sid, packet):
+        self.bytes_sent += len(packet)
+        self.packets_sent += 1
+
+
+def build(sockets):
+    server = CountingServer()
+    senders = []
+    for index in range(sockets):
+        call = f'call-{index // 2}'
+        sid = server.manager.connect(f'eio-{index}', '/')
+        server.manager.enter_room(sid, '/', call)
+        senders.append((sid, call))
+    return server, senders
+
+
+def run(label, sockets, messages, routed):
+    server, senders = build(sockets)
+    payload = {'sender_type': 'customer', 'message': 'customer: sure, it is REDACTED'}
+    started = time.perf_counter()
+    for index in range(messages):
+        sid, call = senders[index % len(senders)]
+        server.emit('chat_message', payload, room=call if routed else None, skip_sid=sid)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {server.packets_sent / messages:>12.1f} {server.bytes_sent / messages:>14.0f} "
+          f"{elapsed / messages * 1e6:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sockets', type=int, default=1000)
+    parser.add_argument('--messages', type=int, default=200)
+    args = parser.parse_args()
+    print(f"{args.sockets} sockets, {args.messages} messages")
+    print(f"{'mode':<10} {'packets/msg':>12} {'bytes/msg':>14} {'emit us/msg':>14}")
+    run('broadcast', args.sockets, args.messages, routed=False)
+    run('room', args.sockets, args.messages, routed=True)
+
+
+if __name__ == '__main__':
+    main()
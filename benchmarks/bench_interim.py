@@ -0,0 +1,99 @@
+"""Replay of interim speech results: incremental deltas vs re-sending full text.
+
+    python benchmarks/bench_interim.py [--utterances 2000]
+
+Each synthetic utterance arrives the way webkitSpeechRecognition reports
+it: one interim per new word, with the last word sometimes revised.  For
+every update it compares the redacted_interim payload (offset + new
+suffix) with a payload carrying the whole redacted interim, and the CPU
+time of InterimRedactor.update with redacting the full text from scratch
+(a fresh InterimRedactor, and redaction.redact_text as used by app.py).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from interim import InterimRedactor  # noqa: E402
+from redaction import redact_text  # noqa: E402
+
+WORDS = ("so yes the card I want to use is my visa and it expires next year "
+         "please go ahead and let me know when you are ready okay").split()
+NUMBERS = ['four', 'one', 'two', 'seven', '4', '12', '345', '6789', 'double', 'five', 'nine']
+REVISIONS = {'for': 'four', 'to': 'two', 'won': 'one', 'ate': 'eight', 'the': 'three'}
+
+
+def interim_sequences(count, seed=11):
+    rng = random.Random(seed)
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 25))]
+        if rng.random() < 0.5:
+            at = rng.randrange(len(words))
+            words[at:at] = [rng.choice(NUMBERS) for _ in range(rng.randint(3, 16))]
+        sequence = []
+        for i in range(1, len(words) + 1):
+            heard = words[:i]
+            mistaken = next((k for k, v in REVISIONS.items() if v == heard[-1]), None)
+            if mistaken and rng.random() < 0.5:
+                # The recognizer first hears a homophone, then corrects it
+                sequence.append(' '.join(heard[:-1] + [mistaken]))
+            sequence.append(' '.join(heard))
+        yield sequence
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--utterances', type=int, default=2000)
+    args = parser.parse_args()
+
+    delta_bytes = full_bytes = 0
+    updates = emitted = 0
+    incremental, fresh, regex = [], [], []
+    for sequence in interim_sequences(args.utterances):
+        redactor = InterimRedactor()
+        shown = ''
+        for text in sequence:
+            updates += 1
+            start = time.perf_counter()
+            delta = redactor.update(text)
+            incremental.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scratch = InterimRedactor()
+            scratch.update(text)
+            fresh.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            redact_text(text)
+            regex.append(time.perf_counter() - start)
+
+            full_bytes += len(json.dumps({'sender_type': 'customer', 'redacted_text': scratch.display}))
+            if delta is not None:
+                emitted += 1
+                offset, replacement = delta
+                shown = shown[:offset] + replacement
+                delta_bytes += len(json.dumps({'sender_type': 'customer', 'offset': offset, 'text': replacement}))
+            assert shown == scratch.display, (text, shown, scratch.display)
+
+    print(f"{args.utterances} utterances, {updates} interim updates, {emitted} deltas emitted")
+    print(f"bytes on the wire: full text {full_bytes}, deltas {delta_bytes} "
+          f"({full_bytes / max(delta_bytes, 1):.1f}x less)")
+    print(f"{'cpu per update':<28} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}")
+    for label, samples in (('incremental update', incremental),
+                           ('full text, InterimRedactor', fresh),
+                           ('full text, redact_text', regex)):
+        print(f"{label:<28} {sum(samples) / len(samples) * 1e6:>7.1f}us {percentile(samples, 0.5) * 1e6:>7.1f}us "
+              f"{percentile(samples, 0.99) * 1e6:>7.1f}us {max(samples) * 1e6:>7.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Per-message logging cost in handle_text: the old prints vs logs.setup_logging.
+
+    python benchmarks/bench_logging.py [--clients 1000 10000] [--messages 2000]
+
+The old handler printed the whole connected_clients dict plus the raw
+original and redacted text on every message.  The new one logs one
+sampled JSON event through a bounded queue.  Output goes to /dev/null
+either way; "handler" is the time spent inside the handler, "total"
+also includes the background writer draining the queue.
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from logs import log, setup_logging  # noqa: E402
+
+TEXT = "sure, the three digits on the back are 4 5 6"
+REDACTED = "sure, the three digits on the back are REDACTED"
+
+
+def make_clients(count):
+    return {
+        f'sid{i:020d}': {'type': 'agent' if i % 2 else 'customer', 'id': f'sid{i:020d}',
+                         'call': f'call{i // 2}', 'room': f'call{i // 2}'}
+        for i in range(count)
+    }
+
+
+def old_handler(connected_clients, client_id):
+    client_type = connected_clients[client_id]['type']
+    print(f"Message received from client {client_id} ({client_type})")
+    print(f"Current connected clients: {connected_clients}")
+    print(f"Original: {TEXT}")
+    print(f"Redacted: {REDACTED}")
+
+
+def new_handler(logger, connected_clients, client_id):
+    client = connected_clients[client_id]
+    log(logger, logging.INFO, 'text_redacted', sid=client_id, type=client['type'], call=client['call'],
+        chars=len(TEXT), changed=REDACTED != TEXT)
+
+
+def run_old(clients, messages, sink):
+    client_id = next(iter(clients))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        for _ in range(messages):
+            old_handler(clients, client_id)
+        sink.flush()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def run_new(clients, messages, sink, rate):
+    handler, listener = setup_logging(sample_rates={'text_redacted': rate}, stream=sink,
+                                      queue_size=messages + 1)
+    logger = logging.getLogger('bench')
+    client_id = next(iter(clients))
+    start = time.perf_counter()
+    for _ in range(messages):
+        new_handler(logger, clients, client_id)
+    handler_time = time.perf_counter() - start
+    listener.stop()
+    total = time.perf_counter() - start
+    logging.getLogger().handlers[:] = []
+    return handler_time, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'logging':<26} {'handler us/msg':>15} {'total us/msg':>13}")
+    with open(os.devnull, 'w') as sink:
+        for count in args.clients:
+            clients = make_clients(count)
+            messages = max(50, args.messages * 1000 // count)
+            rows = [('print (old)', run_old(clients, messages, sink))]
+            for rate in (1.0, 0.01):
+                rows.append((f'queue, sample rate {rate}', run_new(clients, args.messages, sink, rate)))
+            for label, (handler_time, total) in rows:
+                n = messages if label == 'print (old)' else args.messages
+                print(f"{count:>8} {label:<26} {handler_time / n * 1e6:>15.1f} {total / n * 1e6:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
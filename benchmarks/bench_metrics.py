@@ -0,0 +1,72 @@
+"""Per-stage cost of the metrics instrumentation.
+
+    python benchmarks/bench_metrics.py
+
+Times the individual operations the hot path does (reading the clock,
+observing a histogram, bumping a counter) and a RedactionPipeline of
+no-op stages with the per-stage timing on, against the same loop without
+it.  Also times rendering /metrics.
+"""
+import os
+import sys
+import timeit
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from metrics import Registry  # noqa: E402
+from pipeline import RedactionPipeline, Utterance  # noqa: E402
+
+
+class Pass:
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, utterance):
+        return False
+
+
+def uninstrumented(stages, stats, call_id, role, text):
+    # RedactionPipeline.redact as it was before the metrics
+    utterance = Utterance(call_id, role, text)
+    for stage, stat in zip(stages, stats):
+        stat.calls += 1
+        if stage(utterance):
+            stat.resolved += 1
+            break
+    return utterance.redacted
+
+
+def per_call(fn, number=200000):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    registry = Registry()
+    histogram = registry.histogram('redaction_stage_seconds', 'bench', stage='x')
+    counter = registry.counter('redactions', 'bench')
+
+    print(f"{'operation':<40} {'ns':>8}")
+    print(f"{'perf_counter()':<40} {per_call(perf_counter):>8.0f}")
+    print(f"{'histogram.observe(0.003)':<40} {per_call(lambda: histogram.observe(0.003)):>8.0f}")
+    print(f"{'histogram.since(start)':<40} {per_call(lambda: histogram.since(perf_counter())):>8.0f}")
+    print(f"{'counter.value += 1':<40} {per_call(lambda: setattr(counter, 'value', counter.value + 1)):>8.0f}")
+
+    names = ['prefilter', 'local', 'llm']
+    pipeline = RedactionPipeline([Pass(name) for name in names], metrics=registry)
+    plain = RedactionPipeline([Pass(name) for name in names])
+    with_metrics = per_call(lambda: pipeline.redact('c', 'customer', 'hello'))
+    without = per_call(lambda: uninstrumented(plain.stages, plain.stats, 'c', 'customer', 'hello'))
+    overhead = (with_metrics - without) / len(names)
+    print(f"{'pipeline, 3 no-op stages, no metrics':<40} {without:>8.0f}")
+    print(f"{'pipeline, 3 no-op stages, metrics':<40} {with_metrics:>8.0f}")
+    print(f"{'overhead per stage':<40} {overhead:>8.0f}")
+
+    for name in ['receive', 'backend', 'emit']:
+        registry.histogram('redaction_stage_seconds', 'bench', stage=name)
+    registry.gauge('connected_clients', 'bench', lambda: 1000)
+    print(f"{'render /metrics':<40} {per_call(registry.render, number=2000):>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Backend calls and recall of the tiered redaction pipeline.
+
+    python benchmarks/bench_pipeline.py [--calls 500]
+
+Replays a labelled synthetic corpus of agent/customer calls through
+(a) the LLM on every utterance, as handle_text used to, and (b) the
+prefilter -> local -> LLM pipeline.  The LLM is stood in for by
+redaction.redact_text so the run is offline; what matters is how many
+utterances reach it and whether every sensitive one still gets redacted.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pipeline import LLMStage, RedactionPipeline, LocalStage, TriggerPrefilter  # noqa: E402
+from redaction import redact_text  # noqa: E402
+from sessions import SessionStore  # noqa: E402
+from call_redactor import CallRedactor  # noqa: E402
+
+SMALL_TALK = [
+    ("agent", "hello, thanks for calling, how are you today"),
+    ("customer", "hi, I'm good thanks"),
+    ("agent", "how can I help you"),
+    ("customer", "I want to update the card on my account"),
+    ("agent", "sure, let me pull that up for you"),
+    ("customer", "great, thank you"),
+    ("agent", "is there anything else I can help with"),
+    ("customer", "no that's all, have a nice day"),
+]
+TRIGGERS = [
+    "can I have the three digits on the back of your card",
+    "what is the security code please",
+    "could you read me the cvv",
+    "and the verification code on the reverse",
+]
+ANSWERS = [
+    "sure it is {a} {b} {c}",
+    "it's {a}{b}{c}",
+    "the code is {wa} {wb} {wc}",
+    "let me check, it is {a}:{b}{c}",
+]
+OTHER_SENSITIVE = [
+    ("customer", "my email is jane.doe@example.com"),
+    ("customer", "my card number is 4111 1111 1111 1111"),
+]
+WORDS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, transcript):
+        self.calls += 1
+        return redact_text(transcript[-1]["content"])
+
+
+def make_calls(count, seed=3):
+    rng = random.Random(seed)
+    calls = []
+    for _ in range(count):
+        turns = [(role, text, False) for role, text in rng.sample(SMALL_TALK, 5)]
+        digits = [rng.randrange(10), rng.randrange(6), rng.randrange(10)]  # keeps "{a}:{b}{c}" a valid time
+        answer = rng.choice(ANSWERS).format(a=digits[0], b=digits[1], c=digits[2],
+                                            wa=WORDS[digits[0]], wb=WORDS[digits[1]], wc=WORDS[digits[2]])
+        position = rng.randrange(len(turns))
+        turns[position:position] = [("agent", rng.choice(TRIGGERS), False), ("customer", answer, True)]
+        if rng.random() < 0.2:
+            role, text = rng.choice(OTHER_SENSITIVE)
+            turns.append((role, text, True))
+        calls.append(turns)
+    return calls
+
+
+def run(label, redact, calls):
+    sensitive = caught = 0
+    started = time.perf_counter()
+    for call_index, turns in enumerate(calls):
+        for role, text, is_sensitive in turns:
+            redacted = redact(f"call-{call_index}", role, text)
+            if is_sensitive:
+                sensitive += 1
+                caught += redacted != text
+    elapsed = time.perf_counter() - started
+    return caught / sensitive, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    calls = make_calls(args.calls)
+    utterances = sum(len(turns) for turns in calls)
+
+    llm_only = CountingLLM()
+    recall, elapsed = run('llm only', lambda call_id, role, text: llm_only.generate([{"role": role, "content": text}]),
+                          calls)
+    print(f"llm only : {llm_only.calls:>6} backend calls / {utterances} utterances, recall {recall:.3f}")
+
+    redactor = CallRedactor()
+    sessions = SessionStore()
+
+    def redact_locally(call_id, role, text):
+        transcript = {"channel_tag": role, "transcript": text}
+        return redactor.redact_list_new(transcript, sessions.get(call_id))[0]["transcript"]
+
+    llm = CountingLLM()
+    pipeline = RedactionPipeline([
+        TriggerPrefilter.from_triggers(redactor.triggers),
+        LocalStage(redact_locally),
+        LLMStage(llm),
+    ])
+    recall, elapsed = run('pipeline', pipeline.redact, calls)
+    print(f"pipeline : {llm.calls:>6} backend calls / {utterances} utterances, recall {recall:.3f}, "
+          f"{elapsed / utterances * 1e6:.0f} us/utterance locally")
+    for name, stats in pipeline.report().items():
+        print(f"  {name:<10} calls {stats['calls']:>6}  resolved {stats['resolved']:>6}  hit rate {stats['hit_rate']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Socket responsiveness under redaction load, inline vs process pool.
+
+    python benchmarks/bench_pool_responsiveness.py [--processes 2] [--duration 5]
+
+Runs a gevent echo server and a client that pings it every 10 ms on the
+same hub as a set of greenlets doing redaction back to back, first with
+CallRedactor inline and then with PooledRedactor.  Reports ping RTT
+percentiles and redactions per second for both.
+"""
+from gevent import monkey
+if __name__ != '__mp_main__':  # pool workers re-import this file
+    monkey.patch_all()
+
+import argparse  # noqa: E402
+import os  # noqa: E402
+import socket  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import gevent  # noqa: E402
+from gevent.server import StreamServer  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from redaction_pool import PooledRedactor  # noqa: E402
+from sessions import SessionState  # noqa: E402
+from call_redactor import CallRedactor  # noqa: E402
+
+AGENT = "could you read me the security code on the back of your card " * 8
+CUSTOMER = "sure, let me find it, hold on, okay I have it here, it is 4 5 6 " * 8
+
+
+def echo(sock, address):
+    while True:
+        data = sock.recv(64)
+        if not data:
+            break
+        sock.sendall(data)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(label, redactor, workers, duration):
+    server = StreamServer(('127.0.0.1', 0), echo)
+    server.start()
+    stop_at = time.monotonic() + duration
+    rtts = []
+    done = [0]
+
+    def pinger():
+        sock = socket.create_connection(server.address)
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            sock.sendall(b'ping')
+            sock.recv(64)
+            rtts.append(time.perf_counter() - started)
+            gevent.sleep(0.01)
+        sock.close()
+
+    def load():
+        state = SessionState()
+        while time.monotonic() < stop_at:
+            redactor.redact_list_new({"channel_tag": "agent", "transcript": AGENT}, state)
+            redactor.redact_list_new({"channel_tag": "customer", "transcript": CUSTOMER}, state)
+            done[0] += 2
+            gevent.sleep(0)
+
+    gevent.joinall([gevent.spawn(pinger)] + [gevent.spawn(load) for _ in range(workers)])
+    server.stop()
+    print(f"{label:<10} ping p50 {percentile(rtts, 50) * 1e3:7.2f} ms  p99 {percentile(rtts, 99) * 1e3:7.2f} ms  "
+          f"max {max(rtts) * 1e3:7.2f} ms  pings {len(rtts):>5}  redactions/s {done[0] / duration:8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=8, help='greenlets generating redaction load')
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    run('inline', CallRedactor(), args.workers, args.duration)
+    pooled = PooledRedactor(processes=args.processes, max_pending=args.workers * 2, acquire_timeout=5)
+    pooled.warm()
+    run('pool', pooled, args.workers, args.duration)
+    pooled.shutdown()
+
+
+if __name__ == '__main__':
+    main()
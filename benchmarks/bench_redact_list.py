@@ -0,0 +1,80 @@
+"""Scaling of CallRedactor.redact_list with transcript length.
+
+    python benchmarks/bench_redact_list.py
+
+Long calls where the agent keeps asking for the security code and the
+customer never reads out a number are the worst case for the old
+rescan-per-trigger loop (quadratic); the streaming version is linear.
+Also checks batch and one-turn-at-a-time streaming give identical results.
+"""
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from call_redactor import CallRedactor, TranscriptStream  # noqa: E402
+
+
+def legacy_redact_list(redactor, transcripts_list):
+    # The old loop: every trigger rescans the customer turns after it
+    redacted = False
+    for i, text in enumerate(transcripts_list):
+        if text["channel_tag"] == "customer" or not redactor.has_trigger(text["transcript"]):
+            continue
+        customer_messages_searched = 0
+        for customer_text in transcripts_list[i:]:
+            if customer_text["channel_tag"] == "agent":
+                continue
+            customer_messages_searched += 1
+            text = customer_text["transcript"]
+            num_start, num_end = redactor.number_span(text)
+            if num_start is not None and num_end is not None:
+                redacted = True
+                customer_text["transcript"] = text[:num_start] + "REDACTED" + text[num_end:]
+                break
+        if customer_messages_searched >= 5:
+            redacted = True
+    return transcripts_list, redacted
+
+
+def make_call(turns):
+    call = []
+    for t in range(turns):
+        if t % 2 == 0:
+            text = "sorry, what is the security code on the back of your card"
+        else:
+            text = "hold on, I can't find it"
+        call.append({"timestamp": t, "channel_tag": "agent" if t % 2 == 0 else "customer", "transcript": text})
+    call[-1]["transcript"] = "found it, it is 4 5 6"
+    return call
+
+
+def timed(fn, call):
+    call = copy.deepcopy(call)
+    started = time.perf_counter()
+    result = fn(call)
+    return time.perf_counter() - started, result
+
+
+def main():
+    redactor = CallRedactor()
+
+    def streamed(call):
+        stream = TranscriptStream()
+        turns = [turn for text in call for turn in redactor.redact_stream([text], stream)]
+        return turns, stream.redacted
+
+    print(f"{'turns':>6} {'old ms':>10} {'batch ms':>10} {'stream ms':>10}")
+    for turns in (250, 500, 1000, 2000, 4000):
+        call = make_call(turns)
+        old, old_result = timed(lambda c: legacy_redact_list(redactor, c), call)
+        batch, batch_result = timed(redactor.redact_list, call)
+        stream, stream_result = timed(streamed, call)
+        assert old_result == batch_result == stream_result
+        print(f"{turns:>6} {old * 1e3:>10.1f} {batch * 1e3:>10.1f} {stream * 1e3:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
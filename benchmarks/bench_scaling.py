@@ -0,0 +1,121 @@
+"""Throughput of 1..N local_server processes behind call-id routing.
+
+    python benchmarks/bench_scaling.py [--max-workers 4] [--pairs 8] [--duration 10]
+
+Starts N single-worker servers (what deploy/nginx.conf balances across)
+against a stub backend, all sharing one message queue if
+SOCKETIO_MESSAGE_QUEUE is set, and assigns each simulated call to a server
+by hashing its call id, like the proxy does.  Each agent/customer pair
+sends its next utterance as soon as the previous one was redacted; the
+total redactions per second should grow close to linearly with N as long
+as there are cores to spare.  Needs python-socketio's client and
+websocket-client.
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BASE_PORT = 5100
+
+SCRIPT = [
+    ("agent", "could you read me the security code on the back of your card"),
+    ("customer", "sure, it is 4 5 6"),
+    ("agent", "thank you, and the email on the account"),
+    ("customer", "it is jane dot doe at example dot com"),
+]
+
+
+def start_servers(count, backend_url):
+    env = dict(os.environ, ENVIRONMENT='production', REDACT_BACKEND_URL=backend_url)
+    servers = []
+    for index in range(count):
+        servers.append(subprocess.Popen(
+            [sys.executable, 'local_server.py'], cwd=ROOT,
+            env=dict(env, PORT=str(BASE_PORT + index)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+    return servers
+
+
+def wait_ready(count, timeout=60):
+    import urllib.request
+    deadline = time.monotonic() + timeout
+    for index in range(count):
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{BASE_PORT + index}/', timeout=1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+
+def run_pair(call_id, port, duration, results):
+    import socketio
+    url = f'http://127.0.0.1:{port}'
+    clients = {}
+    replies = {}
+    for role in ('agent', 'customer'):
+        client = clients[role] = socketio.Client()
+        replies[role] = received = []
+        client.on('redacted_text', lambda data, received=received: received.append(data))
+        client.connect(f'{url}?type={role}&call={call_id}', transports=['websocket'])
+    done = 0
+    stop_at = time.monotonic() + duration
+    while time.monotonic() < stop_at:
+        for role, text in SCRIPT:
+            received = replies[role]
+            del received[:]
+            clients[role].emit('text', {'text': text})
+            while not received:
+                time.sleep(0.001)
+            done += 1
+    for client in clients.values():
+        client.disconnect()
+    results.put(done)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--pairs', type=int, default=8, help='concurrent calls')
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    from stub_backend import StubBackend
+    stub = StubBackend().start()
+    print(f"{'servers':>7} {'redactions/s':>13} {'per server':>11}")
+    for count in range(1, args.max_workers + 1):
+        servers = start_servers(count, stub.url)
+        try:
+            wait_ready(count)
+            results = multiprocessing.Queue()
+            pairs = []
+            for index in range(args.pairs):
+                call_id = f'call-{index}'
+                port = BASE_PORT + zlib.crc32(call_id.encode()) % count
+                pairs.append(multiprocessing.Process(target=run_pair, args=(call_id, port, args.duration, results)))
+            for pair in pairs:
+                pair.start()
+            total = sum(results.get() for _ in pairs)
+            for pair in pairs:
+                pair.join()
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+        rate = total / args.duration
+        print(f"{count:>7} {rate:>13.0f} {rate / count:>11.0f}")
+    stub.stop()
+
+
+if __name__ == '__main__':
+    main()
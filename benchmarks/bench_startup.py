@@ -0,0 +1,100 @@
+"""Cold start of local_server.py: process exec to listening, ready and first redaction.
+
+    python benchmarks/bench_startup.py [--runs 5] [--pool 0]
+
+Each run execs a fresh server against the stub /generate/ backend and
+records, from the moment of exec:
+
+  listening  '/' answers
+  ready      '/ready' answers 200 (redactor warmed)
+  first      a customer's CVV answer sent as soon as the server listens
+             comes back as redacted_text
+
+--pool N sets REDACT_POOL_PROCESSES (worker start-up then counts towards
+ready).  Needs python-socketio's client and websocket-client.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from loadgen import ROOT, free_port  # noqa: E402
+from stub_backend import StubBackend  # noqa: E402
+
+
+def wait_for(url, deadline):
+    while True:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return time.perf_counter()
+        except (urllib.error.HTTPError, OSError):
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.02)
+
+
+def first_redaction(url, deadline):
+    import socketio
+    agent = socketio.Client(reconnection=False)
+    customer = socketio.Client(reconnection=False)
+    replied = threading.Event()
+    customer.on('redacted_text', lambda data: replied.set())
+    agent.connect(f'{url}?type=agent&call=startup', transports=['websocket'], wait_timeout=30)
+    customer.connect(f'{url}?type=customer&call=startup', transports=['websocket'], wait_timeout=30)
+    agent.emit('text', {'text': 'what is the security code on the back of your card'})
+    customer.emit('text', {'text': 'it is 4 5 6'})
+    replied.wait(deadline - time.perf_counter())
+    done = time.perf_counter()
+    agent.disconnect()
+    customer.disconnect()
+    return done
+
+
+def run(backend_url, pool, timeout=60):
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, ENVIRONMENT='production', PORT=str(port), REDACT_BACKEND_URL=backend_url,
+               REDACT_POOL_PROCESSES=str(pool))
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'local_server.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = started + timeout
+    try:
+        listening = wait_for(url + '/', deadline)
+        ready = []
+        probe = threading.Thread(target=lambda: ready.append(wait_for(url + '/ready', deadline)))
+        probe.start()
+        first = first_redaction(url, deadline)
+        probe.join()
+    finally:
+        server.terminate()
+        server.wait()
+    return listening - started, ready[0] - started, first - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--pool', type=int, default=0, help='REDACT_POOL_PROCESSES for the server')
+    args = parser.parse_args()
+
+    stub = StubBackend(latency=0.0).start()
+    try:
+        results = [run(stub.url, args.pool) for _ in range(args.runs)]
+    finally:
+        stub.stop()
+
+    print(f"{'seconds from exec':<20} {'median':>8} {'min':>8} {'max':>8}")
+    for label, values in zip(('listening', 'ready', 'first redaction'), zip(*results)):
+        print(f"{label:<20} {statistics.median(values):>8.3f} {min(values):>8.3f} {max(values):>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Append, replay and recovery cost of the transcript store.
+
+    python benchmarks/bench_transcripts.py [--turns 100000] [--calls 1000]
+
+Appends --turns synthetic redacted turns spread over --calls calls with
+msync batches of different sizes, then times TranscriptStore.last (what a
+reconnecting socket costs), reading everything back with read_turns (what
+loadgen --replay does) and reopening the directory (index rebuild).
+Runs in a temporary directory, so the disk it lives on matters.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from transcripts import TranscriptStore, read_turns  # noqa: E402
+
+LINES = [
+    "thanks for calling, how can I help you today",
+    "I want to pay my bill with a card",
+    "could you read me the security code on the back of your card",
+    "sure, it is [CVV]",
+    "thank you, and the email on the account",
+    "it is [EMAIL]",
+]
+
+
+def turns(count, calls, seed=0):
+    rng = random.Random(seed)
+    return [(f'call-{rng.randrange(calls)}', ('agent', 'customer')[i % 2], LINES[i % len(LINES)])
+            for i in range(count)]
+
+
+def bench_append(workload, sync_every, segment_bytes):
+    with tempfile.TemporaryDirectory() as directory:
+        store = TranscriptStore(directory, segment_bytes=segment_bytes, max_segments=1 << 20,
+                                sync_every=sync_every)
+        started = time.perf_counter()
+        for call_id, sender, text in workload:
+            store.append(call_id, sender, text)
+        store.sync()
+        elapsed = time.perf_counter() - started
+        size, syncs = store.size, store.syncs
+        store.close()
+    return elapsed, size, syncs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=100000)
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--segment-bytes', type=int, default=4 * 1024 * 1024)
+    args = parser.parse_args()
+    workload = turns(args.turns, args.calls)
+
+    print(f"{'msync every':<14} {'turns/s':>10} {'MB/s':>8} {'msyncs':>8}")
+    for sync_every in (1, 16, 256, args.turns):
+        elapsed, size, syncs = bench_append(workload, sync_every, args.segment_bytes)
+        label = 'end only' if sync_every == args.turns else f'{sync_every} turns'
+        print(f"{label:<14} {len(workload) / elapsed:>10.0f} {size / elapsed / 1e6:>8.1f} {syncs:>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TranscriptStore(directory, segment_bytes=args.segment_bytes, max_segments=1 << 20)
+        for call_id, sender, text in workload:
+            store.append(call_id, sender, text)
+        call_ids = [f'call-{i}' for i in range(args.calls)]
+        print()
+        for count in (5, 20):
+            started = time.perf_counter()
+            for call_id in call_ids:
+                store.last(call_id, count)
+            elapsed = time.perf_counter() - started
+            print(f"last({count}) per reconnect: {elapsed / len(call_ids) * 1e6:.1f} us")
+        segments = store.segment_count
+        index_bytes = sum(positions.itemsize * len(positions) for positions in store._index.values())
+        store.close()
+
+        started = time.perf_counter()
+        replayed = sum(1 for _ in read_turns(directory))
+        elapsed = time.perf_counter() - started
+        print(f"read_turns: {replayed / elapsed:.0f} turns/s")
+
+        started = time.perf_counter()
+        store = TranscriptStore(directory, segment_bytes=args.segment_bytes, max_segments=1 << 20)
+        elapsed = time.perf_counter() - started
+        print(f"reopen ({segments} segments, {len(store)} calls): {elapsed * 1000:.1f} ms")
+        print(f"offset index: {index_bytes / 1024:.0f} KiB for {len(workload)} turns")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Trigger detection: spaCy Matcher (one pattern per phrase) vs the Aho-Corasick index.
+
+    python benchmarks/bench_triggers.py [--utterances 100000] [--extra-phrases 0 500 2000]
+
+Runs both over the same synthetic agent utterances, checks they agree on
+every one, and prints throughput as the phrase dictionary grows.  The
+Matcher column includes spaCy tokenization since has_trigger needed a Doc;
+"matcher only" times it on pre-tokenized Docs.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from spacy.lang.en import English  # noqa: E402
+from spacy.matcher import Matcher  # noqa: E402
+
+from triggers import TriggerIndex, default_dictionary  # noqa: E402
+
+FILLER = ("so could you please confirm the details for me now thanks a lot and "
+          "the account is in your name right okay let me check that for you").split()
+
+
+def utterances(count, phrases, seed=3):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(4, 20))]
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(phrases).replace(' *', ''))
+        result.append(' '.join(words))
+    return result
+
+
+def synthetic_phrases(count, seed=5):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [
+        ' '.join(''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(rng.randint(1, 3)))
+        for _ in range(count)
+    ]
+
+
+def build_matcher(nlp, phrases):
+    matcher = Matcher(nlp.vocab)
+    for idx, phrase in enumerate(phrases):
+        pattern = [{"OP": "*"} if word == '*' else {"LOWER": word} for word in phrase.split()]
+        matcher.add(f"cvv_trigger_{idx}", [pattern])
+    return matcher
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--utterances', type=int, default=100000)
+    parser.add_argument('--extra-phrases', type=int, nargs='+', default=[0, 500, 2000])
+    args = parser.parse_args()
+
+    nlp = English()
+    base = list(default_dictionary().phrases)
+    texts = utterances(args.utterances, base)
+    docs, tokenize_time = timed(lambda: list(nlp.pipe(texts, batch_size=256)))
+
+    print(f"{len(texts)} utterances, {sum(map(len, texts)) / len(texts):.0f} chars each on average")
+    print(f"{'phrases':>8} {'matcher':>12} {'matcher only':>14} {'automaton':>12} {'speedup':>9} {'hits':>7}")
+    for extra in args.extra_phrases:
+        phrases = base + synthetic_phrases(extra)
+        matcher = build_matcher(nlp, phrases)
+        index = TriggerIndex(phrases)
+
+        expected, match_time = timed(lambda: [len(matcher(doc)) > 0 for doc in docs])
+        actual, index_time = timed(lambda: [index.has_trigger(text) for text in texts])
+        if expected != actual:
+            bad = next(text for text, a, b in zip(texts, expected, actual) if a != b)
+            raise AssertionError(f"Matcher and automaton disagree on {bad!r}")
+
+        matcher_time = tokenize_time + match_time
+        print(f"{len(phrases):>8} {len(texts) / matcher_time:>10.0f}/s {len(texts) / match_time:>12.0f}/s "
+              f"{len(texts) / index_time:>10.0f}/s {matcher_time / index_time:>8.1f}x {sum(actual):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Per-event encode/decode CPU and bytes on the wire: JSON vs msgpack packets.
+
+    python benchmarks/bench_wire.py
+
+Encodes and decodes each redaction event the way python-socketio does
+(Packet / MsgPackPacket), for the JSON schema old clients get and the
+lean schema of ?codec=msgpack clients.  Bytes are the WebSocket message
+payload, i.e. including Engine.IO's "4" prefix on text frames.  Needs
+the msgpack package.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from socketio.msgpack_packet import MsgPackPacket  # noqa: E402
+from socketio.packet import EVENT, Packet  # noqa: E402
+
+import wire  # noqa: E402
+
+TEXT = "sure, it is the three digits on the back, REDACTED, and my email is REDACTED"
+
+
+def events(codec):
+    if codec == wire.JSON:
+        text = {'text': TEXT, 'clientType': 'customer'}  # as index.js sends it
+    else:
+        text = wire.incoming_text(TEXT)
+    return [
+        ('text', text),
+        ('redacted_text', wire.redacted_text(codec, TEXT)),
+        ('chat_message', wire.chat_message(codec, 'customer', TEXT)),
+        ('redacted_interim', wire.redacted_interim(codec, 'customer', 42, ' REDACTED')),
+    ]
+
+
+def per_call(fn, number=20000):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def measure(packet_class, event, payload):
+    pkt = packet_class(EVENT, data=[event, payload], namespace='/')
+    encoded = pkt.encode()
+    size = len(encoded) + (1 if isinstance(encoded, str) else 0)
+    encode_ns = per_call(lambda: packet_class(EVENT, data=[event, payload], namespace='/').encode())
+    decode_ns = per_call(lambda: packet_class(encoded_packet=encoded))
+    return size, encode_ns, decode_ns
+
+
+def main():
+    variants = [
+        ('json, original schema', Packet, wire.JSON),
+        ('msgpack, original schema', MsgPackPacket, wire.JSON),
+        ('msgpack, lean schema', MsgPackPacket, wire.MSGPACK),
+    ]
+    print(f"{'event':<18} {'format':<26} {'bytes':>6} {'encode ns':>10} {'decode ns':>10}")
+    for (event, _), *payloads in zip(events(wire.JSON), *(events(codec) for _, _, codec in variants)):
+        for (label, packet_class, _), (_, payload) in zip(variants, payloads):
+            size, encode_ns, decode_ns = measure(packet_class, event, payload)
+            print(f"{event:<18} {label:<26} {size:>6} {encode_ns:>10.0f} {decode_ns:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+"""Socket.IO load generator and end-to-end benchmark for local_server.py and app.py.
+
+    python benchmarks/loadgen.py [--target local_server|app] [--pairs 1000] [--duration 60]
+                                 [--cadence 3] [--procs 2] [--output results.json]
+                                 [--compare baseline.json] [--replay TRANSCRIPT_DIR [--speed 1]]
+
+Starts the target server on a free port against a stub /generate/
+backend (or uses --url), then opens --pairs agent/customer socket pairs
+spread over --procs client processes (each a gevent loop, so thousands
+of sockets are cheap).  Each speaker sends the next line of a short call
+script after an exponentially distributed pause of mean --cadence
+seconds, i.e. realistic speech pace rather than a closed loop.
+
+--replay plays recorded calls instead: the turns a server kept under its
+TRANSCRIPT_DIR (a copy of production's, or of an earlier run), grouped
+by call, each speaker pausing as long as it did in the recording divided
+by --speed.  Pair i plays the i-th recorded call, wrapping around.  The
+recorded text is already redacted, so this reproduces the traffic's
+shape (lengths, pacing, turn-taking, trigger phrases) rather than the
+original numbers.
+
+Records connect time, the `text` -> `redacted_text` round trip (p50,
+p95, p99, max), replies per second, timeouts and the server's RSS, and
+writes them as JSON together with the git commit.  --compare prints
+the change against an earlier result file.  Needs python-socketio's
+client and websocket-client.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+SCRIPT = [
+    ("agent", "thanks for calling, how can I help you today"),
+    ("customer", "I want to pay my bill with a card"),
+    ("agent", "could you read me the security code on the back of your card"),
+    ("customer", "sure, it is 4 5 6"),
+    ("agent", "thank you, and the email on the account"),
+    ("customer", "it is jane dot doe at example dot com"),
+]
+
+# app.py only runs under its own debug server; serve it like production
+# instead, accepting the load clients' origin
+APP_LAUNCHER = (
+    "from gevent import monkey; monkey.patch_all()\n"
+    "import sys, app\n"
+    "app.socketio.server.eio.cors_allowed_origins = '*'\n"
+    "app.socketio.run(app.app, host='127.0.0.1', port=int(sys.argv[1]))\n"
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(target, port, backend_url):
+    env = dict(os.environ, ENVIRONMENT='production', PORT=str(port), REDACT_BACKEND_URL=backend_url)
+    if target == 'app':
+        command = [sys.executable, '-c', APP_LAUNCHER, str(port)]
+    else:
+        command = [sys.executable, 'local_server.py']
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url, timeout=60):
+    import urllib.request
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url + '/socket.io/?EIO=4&transport=polling', timeout=1)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def rss_kb(pid):
+    # The server and the redaction pool workers it started (REDACT_POOL_PROCESSES)
+    total = 0
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            pids += [int(child) for child in children.read().split()]
+    except OSError:
+        pass
+    for each in pids:
+        try:
+            with open(f'/proc/{each}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def recorded_calls(directory, speed):
+    # Per recorded call, its speakers' lines as (role, text, pause before it)
+    from transcripts import read_turns
+
+    calls = {}
+    for turn in read_turns(directory):
+        calls.setdefault(turn.call_id, []).append(turn)
+    scripts = []
+    for turns in calls.values():
+        spoke = {}
+        script = []
+        for turn in turns:
+            # A speaker's first line waits for the call to get that far
+            script.append((turn.sender, turn.text, (turn.time - spoke.get(turn.sender, turns[0].time)) / speed))
+            spoke[turn.sender] = turn.time
+        scripts.append(script)
+    if not scripts:
+        raise SystemExit(f'no recorded turns in {directory}')
+    return scripts
+
+
+def client_process(url, first_pair, pairs, duration, cadence, ramp, timeout, replay=None, speed=1.0):
+    # Runs in its own interpreter (--client), so gevent patches everything first
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent
+    import gevent.event
+    import socketio
+
+    connect_times = []
+    round_trips = []
+    errors = {'connect': 0, 'timeout': 0}
+    last_error = [None]
+    started = time.monotonic()
+    stop_at = started + duration
+    scripts = recorded_calls(replay, speed) if replay else None
+
+    def speaker(client, waiting, lines):
+        for text, pause in lines:
+            gevent.sleep(pause)
+            if time.monotonic() >= stop_at:
+                return
+            waiting.clear()
+            sent = time.perf_counter()
+            client.emit('text', {'text': text})
+            if waiting.wait(timeout):
+                round_trips.append(time.perf_counter() - sent)
+            else:
+                errors['timeout'] += 1
+
+    def pair(index):
+        rng = random.Random(index)
+        call_id = f'load-{index}'
+        gevent.sleep(index / ramp if ramp else 0)
+        clients = []
+        greenlets = []
+        for role in ('agent', 'customer'):
+            client = socketio.Client(reconnection=False)
+            waiting = gevent.event.Event()
+            client.on('redacted_text', lambda data, waiting=waiting: waiting.set())
+            begin = time.perf_counter()
+            try:
+                client.connect(f'{url}?type={role}&call={call_id}', transports=['websocket'],
+                               wait_timeout=timeout)
+            except Exception as exc:
+                errors['connect'] += 1
+                last_error[0] = repr(exc)
+                continue
+            connect_times.append(time.perf_counter() - begin)
+            clients.append(client)
+            # The script or recorded call, over and over, keeping only this speaker's lines
+            if scripts:
+                lines = itertools.cycle([(text, pause) for speaker_role, text, pause in scripts[index % len(scripts)]
+                                         if speaker_role == role])
+            else:
+                own = [text for speaker_role, text in SCRIPT if speaker_role == role]
+                lines = ((text, rng.expovariate(1 / cadence)) for text in itertools.cycle(own))
+            greenlets.append(gevent.spawn(speaker, client, waiting, lines))
+        gevent.joinall(greenlets)
+        for client in clients:
+            client.disconnect()
+
+    gevent.joinall([gevent.spawn(pair, index) for index in range(first_pair, first_pair + pairs)])
+    return {'connect_times': connect_times, 'round_trips': round_trips, 'errors': errors,
+            'last_error': last_error[0], 'elapsed': time.monotonic() - started}
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def at(q):
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+    return {'p50_ms': at(0.50), 'p95_ms': at(0.95), 'p99_ms': at(0.99), 'max_ms': values[-1] * 1000,
+            'count': len(values)}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result, baseline):
+    rows = [
+        ('connect p50 ms', ('connect', 'p50_ms')),
+        ('connect p99 ms', ('connect', 'p99_ms')),
+        ('round trip p50 ms', ('round_trip', 'p50_ms')),
+        ('round trip p95 ms', ('round_trip', 'p95_ms')),
+        ('round trip p99 ms', ('round_trip', 'p99_ms')),
+        ('replies/s', ('throughput_per_s',)),
+        ('server peak RSS MB', ('server_rss_peak_mb',)),
+    ]
+    print(f"{'':<20} {baseline.get('commit') or 'baseline':>12} {result.get('commit') or 'current':>12} {'change':>8}")
+    for label, path in rows:
+        old, new = baseline, result
+        for key in path:
+            old = (old or {}).get(key)
+            new = (new or {}).get(key)
+        if old is None or new is None:
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ''
+        print(f"{label:<20} {old:>12.2f} {new:>12.2f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=['local_server', 'app'], default='local_server')
+    parser.add_argument('--url', help='use an already running server instead of starting one')
+    parser.add_argument('--pairs', type=int, default=1000, help='agent/customer socket pairs')
+    parser.add_argument('--procs', type=int, default=2, help='client processes')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds of traffic')
+    parser.add_argument('--cadence', type=float, default=3.0, help='mean seconds between utterances per speaker')
+    parser.add_argument('--ramp', type=float, default=200.0, help='pairs connected per second, 0 for all at once')
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds to wait for the namespace connect and for redacted_text')
+    parser.add_argument('--backend-latency', type=float, default=0.02, help='stub /generate/ latency in seconds')
+    parser.add_argument('--output', help='write the JSON result here as well as to stdout')
+    parser.add_argument('--compare', help='an earlier JSON result to compare against')
+    parser.add_argument('--replay', help="a server's TRANSCRIPT_DIR whose recorded calls to play back")
+    parser.add_argument('--speed', type=float, default=1.0, help='--replay pauses are divided by this')
+    parser.add_argument('--client', nargs=2, type=int, metavar=('FIRST', 'COUNT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.client:
+        first, count = args.client
+        result = client_process(args.url, first, count, args.duration, args.cadence, args.ramp, args.timeout,
+                                args.replay, args.speed)
+        json.dump(result, sys.stdout)
+        return
+
+    # Two sockets per pair on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    stub = server = None
+    url = args.url
+    if url is None:
+        from stub_backend import StubBackend
+        stub = StubBackend(latency=args.backend_latency).start()
+        port = free_port()
+        server = start_server(args.target, port, stub.url)
+        url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(url)
+        per_proc = -(-args.pairs // args.procs)
+        starts = range(0, args.pairs, per_proc)
+        procs = []
+        for first in starts:
+            # Results can be larger than a pipe buffer
+            output = tempfile.TemporaryFile('w+')
+            procs.append((output, subprocess.Popen([
+                sys.executable, os.path.abspath(__file__), '--client', str(first),
+                str(min(per_proc, args.pairs - first)), '--url', url, '--duration', str(args.duration),
+                '--cadence', str(args.cadence), '--ramp', str(args.ramp / len(starts)),
+                '--timeout', str(args.timeout),
+            ] + (['--replay', args.replay, '--speed', str(args.speed)] if args.replay else []), stdout=output)))
+        rss_peak = 0
+        while any(proc.poll() is None for _, proc in procs):
+            if server is not None:
+                rss_peak = max(rss_peak, rss_kb(server.pid))
+            time.sleep(0.5)
+        collected = []
+        for output, _ in procs:
+            output.seek(0)
+            collected.append(json.load(output))
+            output.close()
+        rss_end = rss_kb(server.pid) if server is not None else 0
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if stub is not None:
+            stub.stop()
+
+    round_trips = [rtt for part in collected for rtt in part['round_trips']]
+    elapsed = max(part['elapsed'] for part in collected)
+    result = {
+        'commit': git_commit(),
+        'target': args.url or args.target,
+        'pairs': args.pairs,
+        'duration_s': args.duration,
+        'cadence_s': args.cadence,
+        'replay': args.replay,
+        'connect': percentiles([t for part in collected for t in part['connect_times']]),
+        'round_trip': percentiles(round_trips),
+        'throughput_per_s': len(round_trips) / elapsed,
+        'errors': {key: sum(part['errors'][key] for part in collected) for key in ('connect', 'timeout')},
+        'last_error': next((part['last_error'] for part in collected if part['last_error']), None),
+        'server_rss_peak_mb': rss_peak / 1024 if server is not None else None,
+        'server_rss_end_mb': rss_end / 1024 if server is not None else None,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(result, json.load(handle))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""24-hour connection churn on a virtual clock: registry size and RSS per hour.
+
+    python benchmarks/soak_sessions.py [--hours 24] [--rate 5] [--lifetime 300]
+                                       [--half-open 0.2] [--storm-every 3]
+
+Drives the server's per-socket bookkeeping (client registry, interim and
+inbound queues, per-call state) the way local_server.py does, without
+sockets: --rate connects per second, each socket talking every ~20 s for
+an exponentially distributed --lifetime.  A --half-open fraction vanish
+without a disconnect, and every --storm-every hours a reconnect storm
+drops a third of the live sockets half-open and reconnects them under new
+sids.  A simulated day takes a few minutes per run.
+
+Runs twice, each in its own process: with the previous plain-dict
+registry, which only shrinks on disconnect, and with ClientRegistry
+(heartbeat expiry, reaper every 5 s, MAX_CLIENTS cap).  Prints live
+sockets, registry entries, per-socket state and RSS every hour.
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backpressure import InboundQueue  # noqa: E402
+from cluster import MemoryClientRegistry  # noqa: E402
+from interim import InterimRedactor  # noqa: E402
+from sessions import SessionStore  # noqa: E402
+
+WORDS = "my card number is four one one one and the code is one two three thanks".split()
+REAP_INTERVAL = 5.0
+TALK_INTERVAL = 20.0
+
+
+def rss_mb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def simulate(mode, hours, rate, lifetime, half_open, storm_every, max_clients, ttl, seed=0):
+    rng = random.Random(seed)
+    clock = [0.0]
+    now = clock.__getitem__
+    stores = dict(max_sessions=10000, idle_timeout=900, clock=lambda: now(0))
+    sessions = SessionStore(**stores)
+    interims = SessionStore(factory=InterimRedactor, **stores)
+    inbound = SessionStore(factory=InboundQueue, **stores)
+    live = set()
+
+    def expired(sid, client):
+        interims.discard(sid)
+        inbound.discard(sid)
+
+    if mode == 'registry':
+        clients = MemoryClientRegistry(max_clients=max_clients, ttl=ttl, alive=live.__contains__,
+                                       on_expire=expired, clock=lambda: now(0))
+        clients.sizers += [interims.size_of, inbound.size_of]
+    else:
+        clients = {}
+
+    # (time, seq, kind, sid); kinds: connect, talk, leave, reap, storm, sample
+    events = []
+    seq = [0]
+
+    def schedule(at, kind, sid=None):
+        seq[0] += 1
+        heapq.heappush(events, (at, seq[0], kind, sid))
+
+    def connect(sid):
+        client = {'type': ('agent', 'customer')[sid % 2], 'id': f'sid-{sid}', 'call': f'call-{sid // 2}',
+                  'room': f'call-{sid // 2}', 'codec': 'json'}
+        if mode == 'registry':
+            if not clients.admit(sid, client):
+                return
+        else:
+            clients[sid] = client
+        live.add(sid)
+        schedule(now(0) + rng.expovariate(1 / TALK_INTERVAL), 'talk', sid)
+        schedule(now(0) + rng.expovariate(1 / lifetime), 'leave', sid)
+
+    def drop(sid):
+        # A clean disconnect runs handle_disconnect; a half-open one runs nothing
+        live.discard(sid)
+        if rng.random() >= half_open:
+            del clients[sid]
+            interims.discard(sid)
+            inbound.discard(sid)
+
+    end = hours * 3600
+    next_sid = 0
+    schedule(0.0, 'sample')
+    schedule(REAP_INTERVAL, 'reap')
+    if storm_every:
+        # Half past, so the hourly samples show where a storm left things
+        schedule((storm_every - 0.5) * 3600, 'storm')
+    samples = []
+    while True:
+        # Arrivals are a Poisson process; merge the next one with the heap
+        arrival = now(0) + rng.expovariate(rate)
+        while events and events[0][0] <= arrival:
+            at, _, kind, sid = heapq.heappop(events)
+            if at > end:
+                return samples
+            clock[0] = at
+            if kind == 'talk':
+                if sid not in live:
+                    continue
+                if mode == 'registry':
+                    clients.touch(sid)
+                words = rng.randint(3, len(WORDS))
+                interims.get(sid).update(' '.join(WORDS[:words]))
+                queue = inbound.get(sid)
+                if queue.put(' '.join(WORDS[:words])):
+                    queue.take()
+                sessions.get(clients.get(sid, {}).get('call', sid))
+                schedule(at + rng.expovariate(1 / TALK_INTERVAL), 'talk', sid)
+            elif kind == 'leave':
+                if sid in live:
+                    drop(sid)
+            elif kind == 'reap':
+                if mode == 'registry':
+                    clients.reap()
+                schedule(at + REAP_INTERVAL, 'reap')
+            elif kind == 'storm':
+                for sid in rng.sample(sorted(live), len(live) // 3):
+                    live.discard(sid)
+                    connect(next_sid)
+                    next_sid += 1
+                schedule(at + storm_every * 3600, 'storm')
+            elif kind == 'sample':
+                samples.append({
+                    'hour': round(at / 3600), 'live': len(live), 'registry': len(clients),
+                    'interims': len(interims), 'inbound': len(inbound), 'rss_mb': rss_mb(),
+                    'session_kb': clients.memory()[0] / 1024 if mode == 'registry' else None,
+                })
+                schedule(at + 3600, 'sample')
+        if arrival > end:
+            return samples
+        clock[0] = arrival
+        connect(next_sid)
+        next_sid += 1
+
+
+def report(mode, samples):
+    print(f"\n{mode}")
+    print(f"{'hour':>4} {'live':>7} {'registry':>9} {'interims':>9} {'inbound':>8} {'RSS MB':>8} {'session KB':>11}")
+    for sample in samples:
+        session_kb = '' if sample['session_kb'] is None else f"{sample['session_kb']:.0f}"
+        print(f"{sample['hour']:>4} {sample['live']:>7} {sample['registry']:>9} {sample['interims']:>9} "
+              f"{sample['inbound']:>8} {sample['rss_mb']:>8.1f} {session_kb:>11}")
+    # Past the first hours' warm-up, a flat process neither grows nor keeps more entries
+    settled = samples[min(2, len(samples) - 1)]
+    print(f"hour {settled['hour']} -> {samples[-1]['hour']}: RSS {samples[-1]['rss_mb'] - settled['rss_mb']:+.1f} MB, "
+          f"registry {samples[-1]['registry'] - settled['registry']:+d} entries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--rate', type=float, default=5.0, help='connects per second')
+    parser.add_argument('--lifetime', type=float, default=300.0, help='mean seconds a socket stays')
+    parser.add_argument('--half-open', type=float, default=0.2, help='fraction of sockets leaving without a disconnect')
+    parser.add_argument('--storm-every', type=float, default=3.0, help='hours between reconnect storms, 0 for none')
+    parser.add_argument('--max-clients', type=int, default=10000)
+    parser.add_argument('--ttl', type=float, default=60.0, help='CLIENT_TTL')
+    parser.add_argument('--mode', choices=['dict', 'registry'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    options = ['--hours', str(args.hours), '--rate', str(args.rate), '--lifetime', str(args.lifetime),
+               '--half-open', str(args.half_open), '--storm-every', str(args.storm_every),
+               '--max-clients', str(args.max_clients), '--ttl', str(args.ttl)]
+    if args.mode:
+        samples = simulate(args.mode, args.hours, args.rate, args.lifetime, args.half_open, args.storm_every,
+                           args.max_clients, args.ttl)
+        json.dump(samples, sys.stdout)
+        return
+    for mode in ('dict', 'registry'):
+        # A fresh process each, so one run's heap does not flatter the other's RSS
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--mode', mode] + options)
+        report(mode, json.loads(output))
+
+
+if __name__ == '__main__':
+    main()
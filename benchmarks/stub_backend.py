@@ -0,0 +1,122 @@
+"""Local stand-in for the LLM /generate/ redaction backend.
+
+    python benchmarks/stub_backend.py --port 8800 --latency 0.05 --failure-rate 0.1
+
+Answers POST /generate/ with the prompt content run through
+redaction.redact_text, after an optional delay.  Batched requests
+(``{"prompts": [...]}``) get a list with one result per prompt.  With
+--serial requests are handled one at a time and --item-latency is added
+per prompt, which roughly models a single GPU.  A configurable share of
+requests fail with a 503 (or hang past the client's read timeout with
+--hang, or cut their chunked body off with --truncate), which is enough to exercise timeouts, retries and the circuit
+breaker in BackendClient.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from redaction import redact_text  # noqa: E402
+
+
+class StubBackend:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, hang=False,
+                 item_latency=0.0, serial=False, truncate=False):
+        self.latency = latency
+        self.item_latency = item_latency
+        self.serial_lock = threading.Lock() if serial else None
+        self.failure_rate = failure_rate
+        self.hang = hang
+        self.truncate = truncate
+        self.requests = 0
+        self.failures = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, result = stub.handle(json.loads(body))
+                if status is None:
+                    self.send_response(200)
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    self.wfile.write(b'40\r\n{"partial')
+                    self.close_connection = True
+                    return
+                payload = json.dumps(result).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_address[1]}/generate/'
+
+    def handle(self, payload):
+        self.requests += 1
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.failures += 1
+            if self.hang:
+                time.sleep(60)
+            if self.truncate:
+                return None, None
+            return 503, {'error': 'simulated failure'}
+        if self.serial_lock is None:
+            return 200, self.process(payload)
+        with self.serial_lock:
+            return 200, self.process(payload)
+
+    def process(self, payload):
+        delay = self.latency + self.item_latency * len(payload.get('prompts', [None]))
+        if delay:
+            time.sleep(delay)
+        return self.respond(payload)
+
+    def respond(self, payload):
+        if 'prompts' in payload:
+            return [redact_text(prompt[-1]['content']) for prompt in payload['prompts']]
+        return redact_text(payload['prompt'][-1]['content'])
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before answering')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of requests that fail')
+    parser.add_argument('--hang', action='store_true', help='failed requests hang instead of returning 503')
+    parser.add_argument('--truncate', action='store_true', help='failed requests cut their body off')
+    parser.add_argument('--item-latency', type=float, default=0.0, help='extra seconds per prompt')
+    parser.add_argument('--serial', action='store_true', help='handle one request at a time')
+    args = parser.parse_args()
+    stub = StubBackend(args.host, args.port, args.latency, args.failure_rate, args.hang,
+                       args.item_latency, args.serial, args.truncate)
+    print(f'stub backend listening on {stub.url}')
+    stub.server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
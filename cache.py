@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry cost on top of the value itself: key digest, tuple, dict slot
+ENTRY_OVERHEAD = 160
+
+
+def normalize(text):
+    return ' '.join(text.split())
+
+
+def _json_size(value):
+    # In-memory size of a parsed JSON value: containers and all they hold
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_json_size(key) + _json_size(item) for key, item in value.items())
+    elif isinstance(value, list):
+        size += sum(_json_size(item) for item in value)
+    return size
+
+
+class RedactionCache:
+    """Bounded LRU + TTL cache of redaction results.
+
+    Keys are a keyed BLAKE2b digest of role and normalized utterance, with a
+    random per-process key, so the raw text is never held and digests can't
+    be matched against a precomputed phrase list.  Values are redacted text
+    only, or the backend's parsed JSON answer.  ``max_bytes`` caps the
+    estimated size of all entries; the least recently used ones go first.  Safe to share between greenlets/threads.
+
+    Pass ``normalizer=None`` when whitespace changes the result (the regex
+    rules in redaction.py treat newlines and double spaces differently).
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=3600, normalizer=normalize, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.normalizer = normalizer
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, role, text):
+        if self.normalizer is not None:
+            text = self.normalizer(text)
+        return hashlib.blake2b(f'{role}\0{text}'.encode(), key=self._secret, digest_size=16).digest()
+
+    def get(self, role, text):
+        key = self.key(role, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.size -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, role, text, value):
+        key = self.key(role, text)
+        size = (len(value.encode()) if isinstance(value, str) else _json_size(value)) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[key] = (value, self.clock() + self.ttl, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def __len__(self):
+        return len(self._entries)
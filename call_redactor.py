@@ -0,0 +1,177 @@
+from collections import deque
+
+import digits
+from triggers import default_dictionary
+
+
+class TranscriptStream:
+    """Progress of CallRedactor.redact_stream through one transcript."""
+
+    __slots__ = ('pending', 'customer_turns', 'redacted')
+
+    def __init__(self):
+        # customer_turns seen when each unanswered trigger fired
+        self.pending = deque()
+        self.customer_turns = 0
+        self.redacted = False
+
+
+class CallRedactor:
+    """Trigger + number-span redaction of call transcripts.
+
+    Triggers come from the shared Aho-Corasick index and numbers from the
+    digits.scan run scanner.
+    """
+
+    def __init__(self):
+        self.warmed = False
+        # Shared with app.py
+        self.triggers = default_dictionary()
+
+        self.customer_messages_searched = 0
+        self.cvv_found = False
+        self.redacted = False
+
+    @property
+    def ready(self):
+        return self.warmed
+
+    def warm(self):
+        # Read the trigger phrases and run one transcript through before the
+        # first real call; raises if triggers.txt cannot be read
+        self.triggers.load()
+        self.number_span("the code is 1 2 3")
+        self.warmed = True
+
+    def has_trigger(self, text):
+        return self.triggers.has_trigger(text)
+
+    def number_span(self, text):
+        # From the first digit run up to where the runs add up to three or
+        # more digits (and on to the last run), or the last time mentioned
+        number_count = 0
+        start_idx = None
+        return_tuple = (None, None)
+        for run in digits.scan(text):
+            if run.kind == digits.TIME:
+                start_idx = run.start
+                return_tuple = (run.start, run.end)
+                continue
+            if number_count == 0:
+                start_idx = run.start
+            number_count += len(run.digits)
+            if number_count >= 3:
+                return_tuple = (start_idx, run.end)
+        return return_tuple
+
+    def collect_texts(self, texts):
+        return list(self.iter_collect_texts(texts))
+
+    def iter_collect_texts(self, texts):
+        # Generator version of collect_texts: each merged turn is yielded as
+        # soon as the speaker changes.
+        current_speaker = None
+        current_timestamp = None
+        current_text = []
+
+        for text in texts:
+            next_text = text['transcript']
+            next_speaker = text['channel_tag']
+            next_timestamp = text['timestamp']
+            if next_speaker != current_speaker:
+                if current_speaker is not None:
+                    yield {
+                        "timestamp": current_timestamp,
+                        "channel_tag": current_speaker,
+                        "transcript": "\n".join(current_text)
+                    }
+                current_speaker = next_speaker
+                current_timestamp = next_timestamp
+                current_text = [next_text]
+            else:
+                current_text.append(next_text)
+
+        if current_speaker is not None:
+            yield {
+                "timestamp": current_timestamp,
+                "channel_tag": current_speaker,
+                "transcript": "\n".join(current_text)
+            }
+
+    def redact_list(self, transcripts_list):
+        stream = TranscriptStream()
+        # Batch mode is the streaming state machine run over the whole list
+        for _ in self.redact_stream(transcripts_list, stream):
+            pass
+        return transcripts_list, stream.redacted
+
+    def redact_stream(self, transcripts, stream=None):
+        """Redact turns one at a time, yielding each as soon as it is final.
+
+        Every agent trigger redacts the first customer turn after it that
+        has a number; triggers waiting for one queue up and are served
+        oldest first, so the whole transcript is handled in one pass.  The
+        running ``redacted`` flag is kept on ``stream``.
+        """
+        if stream is None:
+            stream = TranscriptStream()
+
+        for text in transcripts:
+            if text["channel_tag"] == "customer":
+                self._redact_customer_turn(text, stream)
+            else:
+                if self.has_trigger(text["transcript"]):
+                    stream.pending.append(stream.customer_turns)
+            yield text
+
+    def _redact_customer_turn(self, customer_text, stream):
+        stream.customer_turns += 1
+        pending = stream.pending
+        while pending:
+            text = customer_text["transcript"]
+            num_start, num_end = self.number_span(text)
+            if num_start is None or num_end is None:
+                break
+            customer_text["transcript"] = text[:num_start] + "REDACTED" + text[num_end:]
+            stream.redacted = True
+            # A later trigger still waiting gets to look at the redacted text
+            pending.popleft()
+        # The oldest waiting trigger has searched the most customer turns
+        if pending and stream.customer_turns - pending[0] >= 5:
+            stream.redacted = True
+
+    def redact_list_new(self, transcripts_dict, state=None):
+        # state is a sessions.SessionState for the call; the redactor's own
+        # fields are only used when no per-call state is passed in.
+        if state is None:
+            state = self
+
+        text = transcripts_dict
+
+        if text["channel_tag"] == "agent":
+            if self.has_trigger(text["transcript"]):
+                state.cvv_found = True
+
+
+        if state.cvv_found:
+            if text["channel_tag"] == "customer":
+                customer_text = text
+
+                state.customer_messages_searched += 1
+                temp_text = customer_text["transcript"]
+                num_start, num_end = self.number_span(temp_text)
+
+                if num_start is not None and num_end is not None:
+                    state.redacted = True
+                    state.cvv_found = False
+                    state.customer_messages_searched = 0
+                    customer_text["transcript"] = temp_text[:num_start] + "REDACTED" + temp_text[num_end:]
+
+
+                if state.customer_messages_searched >= 5:
+                    state.redacted = True
+
+
+                return transcripts_dict, state.redacted
+
+        return transcripts_dict, state.redacted
@@ -0,0 +1,273 @@
+import json
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import socketio
+
+from sessions import approx_size
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """In-process stand-in for a Redis/Kombu message queue.
+
+    Every manager created on the same channel receives every published
+    message, pickled like the real backends do, so several Socket.IO
+    servers in one process (tests, benchmarks) behave like workers sharing
+    a queue.
+    """
+
+    name = 'local'
+    _subscribers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._queue = queue.Queue()
+        if not write_only:
+            with self._lock:
+                self._subscribers.setdefault(channel, []).append(self._queue)
+
+    def _publish(self, data):
+        message = pickle.dumps(data)
+        with self._lock:
+            subscribers = list(self._subscribers.get(self.channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def _listen(self):
+        while True:
+            yield self._queue.get()
+
+
+def socketio_options(message_queue):
+    """SocketIO() keyword arguments for a SOCKETIO_MESSAGE_QUEUE value.
+
+    Empty means a single process; ``local://`` the in-process stand-in;
+    anything else (``redis://...``, ``amqp://...``) is handed to
+    Flask-SocketIO as its message_queue.
+    """
+    if not message_queue:
+        return {}
+    if message_queue.startswith('local://'):
+        return {'client_manager': LocalPubSubManager(channel=message_queue[len('local://'):] or 'socketio')}
+    return {'message_queue': message_queue}
+
+
+class ClientRegistry:
+    """Connected clients, expired when their heartbeats stop.
+
+    Each socket this process registers has a last heartbeat (registration,
+    then ``touch``), kept oldest first like SessionStore, so ``reap`` only
+    looks at expired entries and every operation is O(1) per socket.  An
+    entry silent for ``ttl`` seconds is renewed if ``alive(sid)`` says its
+    socket is still there (a quiet listener) and otherwise removed and
+    handed to ``on_expire(sid, client)``: a socket whose disconnect never
+    came, e.g. a half-open connection or one lost in a reconnect storm.
+
+    ``admit`` refuses new sockets while this process holds ``max_clients``
+    that are not expired.  ``usage(sid)`` estimates the bytes a socket
+    holds here: its entry plus whatever the ``sizers`` (callables of the
+    sid, for the server's other per-socket state) report.
+    """
+
+    def __init__(self, max_clients=10000, ttl=60.0, alive=None, on_expire=None, clock=time.monotonic):
+        self.max_clients = max_clients
+        self.ttl = ttl
+        self.alive = alive
+        self.on_expire = on_expire
+        self.clock = clock
+        self.sizers = []
+        self.refused = 0
+        self.reaped = 0
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def admit(self, sid, client):
+        """Register the client unless this process is full; False if refused."""
+        if sid not in self._seen and len(self._seen) >= self.max_clients:
+            self.reap()
+            if len(self._seen) >= self.max_clients:
+                self.refused += 1
+                return False
+        self[sid] = client
+        return True
+
+    def touch(self, sid):
+        with self._lock:
+            if sid in self._seen:
+                self._seen[sid] = self.clock()
+                self._seen.move_to_end(sid)
+
+    def reap(self):
+        """Remove the clients whose heartbeat stopped; returns how many."""
+        now = self.clock()
+        deadline = now - self.ttl
+        expired = []
+        with self._lock:
+            while self._seen:
+                sid, seen = next(iter(self._seen.items()))
+                if seen > deadline:
+                    break
+                if self.alive is not None and self.alive(sid):
+                    self._seen[sid] = now
+                    self._seen.move_to_end(sid)
+                    continue
+                del self._seen[sid]
+                expired.append((sid, self._pop(sid)))
+            held = list(self._seen)
+        self._renew(held)
+        self.reaped += len(expired)
+        if self.on_expire is not None:
+            for sid, client in expired:
+                self.on_expire(sid, client)
+        return len(expired)
+
+    def _renew(self, sids):
+        # After each reap: the sids this process still holds.  For registries
+        # shared between processes.
+        pass
+
+    def usage(self, sid):
+        return self._entry_size(sid) + sum(sizer(sid) for sizer in self.sizers)
+
+    def memory(self):
+        # (total, largest) usage over this process's clients
+        sizes = [self.usage(sid) for sid in list(self._seen)]
+        return sum(sizes), max(sizes, default=0)
+
+    def __setitem__(self, sid, client):
+        self._put(sid, client)
+        with self._lock:
+            self._seen[sid] = self.clock()
+            self._seen.move_to_end(sid)
+
+    def __getitem__(self, sid):
+        client = self.get(sid)
+        if client is None:
+            raise KeyError(sid)
+        return client
+
+    def __delitem__(self, sid):
+        with self._lock:
+            self._seen.pop(sid, None)
+        self._pop(sid)
+
+    @property
+    def local_count(self):
+        # Clients registered by this process (the cap applies to these)
+        return len(self._seen)
+
+
+class MemoryClientRegistry(ClientRegistry):
+    """Connected clients of this process only."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._clients = {}
+
+    def _put(self, sid, client):
+        self._clients[sid] = client
+
+    def _pop(self, sid):
+        return self._clients.pop(sid, None)
+
+    def _entry_size(self, sid):
+        return approx_size(self._clients.get(sid))
+
+    def get(self, sid, default=None):
+        return self._clients.get(sid, default)
+
+    def __contains__(self, sid):
+        return sid in self._clients
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __repr__(self):
+        return f'<MemoryClientRegistry {len(self)} clients>'
+
+
+class RedisClientRegistry(ClientRegistry):
+    """Connected clients of every worker, in one Redis hash keyed by sid.
+
+    Heartbeats are tracked by the worker holding the socket, so each one
+    reaps its own clients.  After every reap it also stamps all the sids it
+    still holds with the time in the ``<key>:seen`` sorted set, and removes
+    the sids nobody has stamped for ``orphan_ttl`` seconds (by default
+    twice ``ttl``): those of a worker that died without reaping them.
+    ``wall_clock`` must agree across workers to within ``orphan_ttl``.
+
+    ``client`` is an existing redis client to use instead of connecting to
+    ``url``.
+    """
+
+    def __init__(self, url=None, key='connected_clients', orphan_ttl=None, wall_clock=time.time, client=None,
+                 **options):
+        super().__init__(**options)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('CLIENT_REGISTRY_URL=redis://... needs the redis package installed') from None
+            client = redis.Redis.from_url(url)
+        self.redis = client
+        self.key = key
+        self.seen_key = key + ':seen'
+        self.orphan_ttl = 2 * self.ttl if orphan_ttl is None else orphan_ttl
+        self.wall_clock = wall_clock
+        self.orphans_reaped = 0
+
+    def _put(self, sid, client):
+        pipe = self.redis.pipeline()
+        pipe.hset(self.key, sid, json.dumps(client))
+        pipe.zadd(self.seen_key, {sid: self.wall_clock()})
+        pipe.execute()
+
+    def _pop(self, sid):
+        client = self.get(sid)
+        pipe = self.redis.pipeline()
+        pipe.hdel(self.key, sid)
+        pipe.zrem(self.seen_key, sid)
+        pipe.execute()
+        return client
+
+    def _renew(self, sids, batch=1000):
+        now = self.wall_clock()
+        pipe = self.redis.pipeline(transaction=False)
+        for start in range(0, len(sids), batch):
+            pipe.zadd(self.seen_key, dict.fromkeys(sids[start:start + batch], now))
+        pipe.execute()
+        orphans = self.redis.zrangebyscore(self.seen_key, '-inf', now - self.orphan_ttl, start=0, num=batch)
+        if orphans:
+            pipe = self.redis.pipeline()
+            pipe.hdel(self.key, *orphans)
+            pipe.zrem(self.seen_key, *orphans)
+            pipe.execute()
+            self.orphans_reaped += len(orphans)
+
+    def _entry_size(self, sid):
+        # Held in Redis, not in this process
+        return 0
+
+    def __contains__(self, sid):
+        return bool(self.redis.hexists(self.key, sid))
+
+    def __len__(self):
+        return self.redis.hlen(self.key)
+
+    def get(self, sid, default=None):
+        client = self.redis.hget(self.key, sid)
+        return default if client is None else json.loads(client)
+
+    def __repr__(self):
+        return f'<RedisClientRegistry {len(self)} clients>'
+
+
+def make_registry(url, **options):
+    # options: ClientRegistry's max_clients, ttl, alive, on_expire
+    if url and url.startswith('redis'):
+        return RedisClientRegistry(url, **options)
+    return MemoryClientRegistry(**options)
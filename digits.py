@@ -0,0 +1,227 @@
+import re
+
+CARD = 'card'
+CVV = 'cvv'
+PHONE = 'phone'
+TIME = 'time'
+NUMBER = 'number'
+
+# Spoken numbers: digit words, tens and scales.  "four five six" -> 456,
+# "twenty twenty" -> 2020, "four hundred twelve" -> 412, "double four" -> 44.
+UNITS = {'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+         'eight': 8, 'nine': 9}
+TEENS = {'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+         'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19}
+TENS = {'twenty': 2, 'thirty': 3, 'forty': 4, 'fifty': 5, 'sixty': 6, 'seventy': 7, 'eighty': 8, 'ninety': 9}
+SCALES = {'hundred': 2, 'thousand': 3}
+REPEATS = {'double': 2, 'triple': 3}
+NUMBER_WORDS = frozenset(UNITS) | frozenset(TEENS) | frozenset(TENS) | frozenset(SCALES) | frozenset(REPEATS)
+
+# A whole word that is a number: digits (maybe "3pm"-style) or a number word.
+# Matched against the lowercased text; the lookahead on first letters lets
+# the engine skip most positions cheaply.
+_CANDIDATE = re.compile(
+    r'(?=[0-9' + ''.join(sorted({word[0] for word in NUMBER_WORDS})) + r'])(?<![^\W_])'
+    r'(?:(?P<digits>\d+)(?P<am_pm>[ap]m)?|' + '|'.join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r')'
+    r'(?![^\W_])'
+)
+# What may sit between the numbers of one run: "4 1 1", "4111-1111", "3:52", "(555) 123"
+_GAP = re.compile(r'[\s\-:.,/()]*')
+_TIME = re.compile(r'(?:[01]?\d|2[0-3]):[0-5]?\d(?::[0-5]\d)?')
+
+# (brand, lowest and highest prefix of the BIN range, card lengths)
+BIN_RANGES = [
+    ('visa', '4', '4', (13, 16, 19)),
+    ('mastercard', '51', '55', (16,)),
+    ('mastercard', '2221', '2720', (16,)),
+    ('amex', '34', '34', (15,)),
+    ('amex', '37', '37', (15,)),
+    ('discover', '6011', '6011', (16, 17, 18, 19)),
+    ('discover', '644', '649', (16, 17, 18, 19)),
+    ('discover', '65', '65', (16, 17, 18, 19)),
+    ('diners', '300', '305', (14, 15, 16, 17, 18, 19)),
+    ('diners', '36', '36', (14, 15, 16, 17, 18, 19)),
+    ('diners', '38', '39', (16, 17, 18, 19)),
+    ('jcb', '3528', '3589', (16, 17, 18, 19)),
+    ('unionpay', '62', '62', (16, 17, 18, 19)),
+]
+
+
+def luhn_valid(digits):
+    total = 0
+    for position, char in enumerate(reversed(digits)):
+        value = ord(char) - 48
+        if position % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def card_brand(digits):
+    # The issuer whose BIN range and card length fit; None if there is none
+    for brand, low, high, lengths in BIN_RANGES:
+        if len(digits) in lengths and low <= digits[:len(low)] <= high:
+            return brand
+    return None
+
+
+class DigitRun:
+    """A run of spoken and/or written digits in a text, classified.
+
+    ``start``/``end`` are character offsets of the whole run, ``digits``
+    its normalized digit string and ``kind`` one of CARD, CVV, PHONE, TIME
+    or NUMBER; ``brand`` is set for cards.  CVV only says the run has the
+    length of one: whether it is a security code depends on what was said
+    around it.
+    """
+
+    __slots__ = ('start', 'end', 'digits', 'kind', 'brand')
+
+    def __init__(self, start, end, digits, kind, brand=None):
+        self.start = start
+        self.end = end
+        self.digits = digits
+        self.kind = kind
+        self.brand = brand
+
+    def __repr__(self):
+        return f'DigitRun({self.start}, {self.end}, {self.digits!r}, {self.kind!r})'
+
+
+def _classify(text, start, end, digits, am_pm):
+    if am_pm or (':' in text[start:end] and _TIME.fullmatch(text, start, end)):
+        return TIME, None
+    size = len(digits)
+    if 13 <= size <= 19 and luhn_valid(digits):
+        brand = card_brand(digits)
+        if brand is not None:
+            return CARD, brand
+    if size == 10 or (size == 11 and digits[0] == '1'):
+        return PHONE, None
+    if 3 <= size <= 4:
+        return CVV, None
+    return NUMBER, None
+
+
+class _Run:
+    # Digits of the run being read, and where each token's digits end
+    __slots__ = ('start', 'end', 'digits', 'fill', 'repeat', 'cuts', 'am_pm')
+
+    def __init__(self, start):
+        self.start = start
+        self.end = start
+        self.digits = []
+        # Trailing zeros of "twenty" / "hundred" a following word may fill in
+        self.fill = 0
+        self.repeat = 1
+        # (character offset, digits so far) after each token
+        self.cuts = []
+        self.am_pm = False
+
+    def add(self, word, end):
+        digits = self.digits
+        if word.isdigit():
+            digits.extend(word * self.repeat)
+            self.fill = 0
+        elif word in UNITS:
+            if self.fill:
+                digits[-1] = str(UNITS[word])
+            else:
+                digits.extend(str(UNITS[word]) * self.repeat)
+            self.fill = 0
+        elif word in TEENS:
+            if self.fill >= 2:
+                digits[-2:] = str(TEENS[word])
+            else:
+                digits.extend(str(TEENS[word]))
+            self.fill = 0
+        elif word in TENS:
+            if self.fill >= 2:
+                digits[-2:] = (str(TENS[word]), '0')
+            else:
+                digits.extend((str(TENS[word]), '0'))
+            self.fill = 1
+        elif word in SCALES:
+            if not digits:
+                digits.append('1')
+            digits.extend('0' * SCALES[word])
+            self.fill = SCALES[word]
+        self.end = end
+        if word in REPEATS:
+            self.repeat = REPEATS[word]
+        else:
+            self.repeat = 1
+            self.cuts.append((end, len(digits)))
+
+
+def _joins(text, end, match):
+    # Whether the number at ``match`` continues the run ending at ``end``.
+    # A bare '.' or ',' after a digit only groups digits the way "1,000" and
+    # "555.123.4567" do; "19.99", "1.2.3" and "2,5" are separate numbers.
+    start = match.start()
+    if not _GAP.fullmatch(text, end, start):
+        return False
+    if start - end == 1 and text[end] in '.,' and text[end - 1].isdigit():
+        number = match.group('digits')
+        return number is not None and len(number) in (3, 4)
+    return True
+
+
+def _finish(text, run, runs):
+    if not run.cuts:
+        return
+    # A trailing "double" is not part of the number
+    run.end = run.cuts[-1][0]
+    digits = ''.join(run.digits)
+    kind, brand = _classify(text, run.start, run.end, digits, run.am_pm)
+    if kind == NUMBER and len(digits) > 16:
+        # Card and CVV (or more) read out in one go: split after the card
+        for cut, count in run.cuts:
+            if count in (15, 16) and luhn_valid(digits[:count]) and card_brand(digits[:count]):
+                runs.append(DigitRun(run.start, cut, digits[:count], CARD, card_brand(digits[:count])))
+                rest = _GAP.match(text, cut).end()
+                kind, brand = _classify(text, rest, run.end, digits[count:], False)
+                runs.append(DigitRun(rest, run.end, digits[count:], kind, brand))
+                return
+    runs.append(DigitRun(run.start, run.end, digits, kind, brand))
+
+
+def scan(text, pos=0):
+    """Every run of spoken or written digits in ``text[pos:]``, in order, as DigitRuns.
+
+    Numbers separated only by spaces and the punctuation of card, phone and
+    time formats belong to one run, but a decimal point ends it; a run's "+"
+    or "(" prefix is part of it.
+    A single regex pass finds the number words, so plain speech costs about
+    as much as one ``re.finditer``.
+    """
+    runs = []
+    run = None
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Lowercasing a few non-ASCII letters changes their length
+        lowered = ''.join(char if len(char.lower()) != 1 else char.lower() for char in text)
+    for match in _CANDIDATE.finditer(lowered, pos):
+        start = match.start()
+        if run is not None and not _joins(text, run.end, match):
+            _finish(text, run, runs)
+            run = None
+        if run is None:
+            if start and text[start - 1] in '+(':
+                start -= 1
+            run = _Run(start)
+        number = match.group('digits')
+        if number is None:
+            run.add(match.group(), match.end())
+        else:
+            run.add(number, match.end())
+            if match.group('am_pm'):
+                # "3:52pm" / "352pm": the suffix makes it a time and ends it
+                run.am_pm = True
+                _finish(text, run, runs)
+                run = None
+    if run is not None:
+        _finish(text, run, runs)
+    return runs
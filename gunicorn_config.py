@@ -1,6 +1,32 @@
-bind = "0.0.0.0:10000"
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
 worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
-workers = 1
+# More than one worker needs SOCKETIO_MESSAGE_QUEUE and a Redis
+# SESSION_STORE_URL (or CLIENT_REGISTRY_URL) set, and clients on
+# websocket-only transport: gunicorn cannot pin a long-polling client, or
+# both sockets of a call, to one worker.  For polling clients, run several
+# single-worker servers behind a proxy that hashes on the call id (see
+# deploy/nginx.conf).
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
 loglevel = "debug"
 keepalive = 65
-timeout = 120 
\ No newline at end of file
+timeout = 120
+
+
+def shared_state_missing(environ):
+    # What keeps a call working when its agent and customer land on different workers
+    message_queue = environ.get('SOCKETIO_MESSAGE_QUEUE', '')
+    session_store = environ.get('SESSION_STORE_URL', environ.get('CLIENT_REGISTRY_URL', message_queue))
+    missing = []
+    if not message_queue or message_queue.startswith('local://'):
+        missing.append('SOCKETIO_MESSAGE_QUEUE')
+    if not session_store.startswith('redis'):
+        missing.append('a Redis SESSION_STORE_URL')
+    return missing
+
+
+if workers > 1 and shared_state_missing(os.environ):
+    raise SystemExit(f"WEB_CONCURRENCY={workers} needs {' and '.join(shared_state_missing(os.environ))}: "
+                     "otherwise the agent's trigger and the customer's answer can reach different "
+                     "workers and the security code is never redacted")
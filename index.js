@@ -7,6 +7,17 @@ const redactedText = document.getElementById('redactedText');
 // Initialize Socket.IO with reconnection options and client type
 const urlParams = new URLSearchParams(window.location.search);
 const clientType = urlParams.get('type') || 'customer'; // Default to customer if not specified
+// Shared by the agent and customer of one call.  A page opened without ?call=
+// starts a new call and puts its id in the address bar, so that link is the
+// one to give the other side.
+const callId = urlParams.get('call') || newCallId();
+if (!urlParams.has('call')) {
+    urlParams.set('call', callId);
+    history.replaceState(null, '', `${window.location.pathname}?${urlParams}${window.location.hash}`);
+}
+// ?codec=msgpack: binary packets and a leaner event schema, if the page also
+// loaded socket.io-msgpack-parser as window.msgpackParser; JSON otherwise
+const lean = urlParams.get('codec') === 'msgpack' && Boolean(window.msgpackParser);
 
 // New chat UI elements
 const chatContainer = document.getElementById('chatContainer');
@@ -16,7 +27,7 @@ const clientTypeDisplay = document.getElementById('clientTypeDisplay');
 const SOCKET_URL = 'http://10.1.30.89:5000'; // 'https://speech-to-text-wetd.onrender.com';
 
 // Display client type
-clientTypeDisplay.textContent = `Connected as: ${clientType}`;
+clientTypeDisplay.textContent = `Connected as: ${clientType} (call ${callId})`;
 
 // Add connection status indicator
 const connectionStatus = document.createElement('div');
@@ -37,12 +48,52 @@ const socket = io(SOCKET_URL, {
     reconnectionDelay: 1000,
     reconnectionDelayMax: 5000,
     timeout: 20000,
-    query: { type: clientType } // Send client type with connection
+    transports: ['websocket'], // No long-polling: gunicorn cannot pin a polling client to one worker (see gunicorn_config.py)
+    query: Object.assign({ type: clientType, call: callId }, lean && { codec: 'msgpack' }), // Send client type with connection
+    parser: lean ? window.msgpackParser : undefined
 });
 
+function newCallId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+}
+
+function textPayload(text) {
+    return lean ? text : { text: text, clientType: clientType };
+}
+
 // Add a flag to track if we should maintain connection
 let maintainConnection = true;
 
+// Redacted interim transcript per speaker, patched by 'redacted_interim' deltas
+const interims = {};
+let lastInterim = '';
+
+function showInterim(senderType, text) {
+    if (senderType === clientType) {
+        redactedText.value = text;
+        return;
+    }
+    let interimEl = document.getElementById(`interim-${senderType}`);
+    if (!text) {
+        if (interimEl) interimEl.remove();
+        return;
+    }
+    if (!interimEl) {
+        interimEl = document.createElement('div');
+        interimEl.id = `interim-${senderType}`;
+        interimEl.className = `message ${senderType} interim`;
+        chatContainer.appendChild(interimEl);
+    }
+    interimEl.textContent = `${senderType}: ${text}`;
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+}
+
+function clearInterim(senderType) {
+    delete interims[senderType];
+    if (senderType !== clientType) showInterim(senderType, '');
+}
+
 // Move all socket event setup to this function
 function setupSocketListeners() {
     socket.on('connect', () => {
@@ -67,12 +118,38 @@ function setupSocketListeners() {
     });
 
     socket.on('redacted_text', (data) => {
-        redactedText.value = data.redacted_text;
+        clearInterim(clientType);
+        redactedText.value = lean ? data : data.redacted_text;
+        if (connectionStatus.className === 'status-overloaded') updateConnectionStatus('Connected');
+    });
+
+    // Sent once when the server starts dropping our text; cleared by the next reply
+    socket.on('overloaded', (data) => {
+        console.warn(`Server overloaded, ${data.dropped} message(s) dropped`);
+        updateConnectionStatus('Overloaded');
+    });
+
+    socket.on('redacted_interim', (data) => {
+        const [senderType, offset, text] = lean ? data : [data.sender_type, data.offset, data.text];
+        const current = interims[senderType] || '';
+        interims[senderType] = current.slice(0, offset) + text;
+        showInterim(senderType, interims[senderType]);
     });
 
     socket.on('chat_message', (data) => {
-        console.log(`${data.sender_type}: ${data.message}`);
-        addMessageToChat(data.sender_type, data.message);
+        const [senderType, message] = lean ? [data[0], `${data[0]}: ${data[1]}`] : [data.sender_type, data.message];
+        console.log(`${senderType}: ${message}`);
+        clearInterim(senderType);
+        addMessageToChat(senderType, message);
+    });
+
+    // On (re)connecting to a call the server sends its latest turns; they replace the chat shown so far
+    socket.on('transcript_replay', (turns) => {
+        chatContainer.querySelectorAll('.message:not(.interim)').forEach((el) => el.remove());
+        turns.forEach((data) => {
+            const [senderType, message] = lean ? [data[0], `${data[0]}: ${data[1]}`] : [data.sender_type, data.message];
+            addMessageToChat(senderType, message);
+        });
     });
 }
 
@@ -106,10 +183,7 @@ function sendMessage() {
     const message = messageInput.value.trim();
     if (message) {
         // Send message to server
-        socket.emit('text', { 
-            text: message,
-            clientType: clientType
-        });
+        socket.emit('text', textPayload(message));
         
         // Add message to own chat (optionally, you can wait for server response)
         addMessageToChat(clientType, message);
@@ -143,13 +217,16 @@ if ('webkitSpeechRecognition' in window) {
         // Update original text immediately with both interim and final results
         originalText.value = final_transcript || interim_transcript;
         
-        // Only send final transcripts to server for redaction
+        // Interim results are redacted incrementally; the server sends back deltas
+        if (!final_transcript && interim_transcript && interim_transcript !== lastInterim) {
+            socket.emit('interim_text', lean ? interim_transcript : { text: interim_transcript });
+        }
+        lastInterim = final_transcript ? '' : interim_transcript;
+
+        // Final transcripts go through the full redaction pipeline
         if (final_transcript) {
             // Chat message to server
-            socket.emit('text', { 
-                text: final_transcript,
-                clientType: clientType
-            });
+            socket.emit('text', textPayload(final_transcript));
              addMessageToChat(clientType, final_transcript);
         }
     };
@@ -0,0 +1,100 @@
+import re
+from bisect import bisect_left
+
+import digits
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+MASK = 'REDACTED'
+
+
+def _is_number(word):
+    return word.isdigit() or word.lower() in digits.NUMBER_WORDS
+
+
+def common_prefix(a, b):
+    if b.startswith(a):
+        return len(a)
+    size = min(len(a), len(b))
+    i = 0
+    while i < size and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class InterimRedactor:
+    """Redacts the interim (not yet final) transcript of one speaker.
+
+    Interim results keep growing and revising their last words.  Only the
+    part after the last word both versions share is scanned again, and the
+    caller gets a delta ``(offset, replacement)`` against the text it sent
+    last time rather than the whole string.
+
+    Interims only get the cheap part of redaction: runs of spoken or written
+    numbers (as digits.scan reads them) with at least ``min_digits`` digits
+    are masked.  A run still
+    open at the end of the text is masked whatever its length, since the
+    next update may complete it; the final transcript goes through the full
+    pipeline as before.
+    """
+
+    __slots__ = ('min_digits', 'raw', 'display', '_raw_marks', '_display_marks', 'last_seen')
+
+    def __init__(self, now=0.0, min_digits=3):
+        self.min_digits = min_digits
+        self.last_seen = now
+        self.reset()
+
+    def reset(self):
+        self.raw = ''
+        self.display = ''
+        # (raw, display) positions after each non-number word: display[:d]
+        # is final for raw[:r] because no run can span a plain word
+        self._raw_marks = [0]
+        self._display_marks = [0]
+
+    def update(self, text):
+        """Return (offset, replacement) turning the last display into the new one, or None."""
+        shared = common_prefix(self.raw, text)
+        # A word ending right at the first change may still be growing
+        keep = max(bisect_left(self._raw_marks, shared) - 1, 0)
+        del self._raw_marks[keep + 1:]
+        del self._display_marks[keep + 1:]
+        start, display_start = self._raw_marks[keep], self._display_marks[keep]
+
+        tail = self._redact_from(text, start, display_start)
+        old_tail = self.display[display_start:]
+        self.raw = text
+        self.display = self.display[:display_start] + tail
+
+        offset = common_prefix(old_tail, tail)
+        if offset == len(old_tail) == len(tail):
+            return None
+        return display_start + offset, tail[offset:]
+
+    def _redact_from(self, text, start, display_start):
+        pieces = []
+        size = display_start
+        copied = start
+        runs = digits.scan(text, start)
+        for index, run in enumerate(runs):
+            size = self._copy_words(text, copied, run.start, pieces, size)
+            if index == len(runs) - 1 and _TOKEN.search(text, run.end) is None:
+                # Still being spoken, or not: the next update will tell
+                shown = MASK
+            else:
+                shown = MASK if len(run.digits) >= self.min_digits else text[run.start:run.end]
+            pieces.append(shown)
+            size += len(shown)
+            copied = run.end
+        self._copy_words(text, copied, len(text), pieces, size)
+        return ''.join(pieces)
+
+    def _copy_words(self, text, start, end, pieces, size):
+        # Copy text[start:end], marking the end of every word no run can take in
+        for match in _TOKEN.finditer(text, start, end):
+            if not _is_number(match.group()):
+                self._raw_marks.append(match.end())
+                self._display_marks.append(size + match.end() - start)
+        pieces.append(text[start:end])
+        return size + end - start
@@ -1,274 +1,438 @@
+import gevent
 from gevent import monkey
-monkey.patch_all()
-from spacy.lang.en import English
-from spacy.matcher import Matcher
-from typing import List, Tuple
-import re
-from flask import Flask, request
-from flask_socketio import SocketIO, emit
+if __name__ != '__mp_main__':  # Redaction pool workers re-import this file unpatched
+    monkey.patch_all()
+from flask import Flask, Response, request
+from flask_socketio import ConnectionRefusedError, SocketIO, emit, join_room
 import json
 from flask_cors import CORS
-import requests
- 
-# time_pattern = r"\b(?=[2]?\d{2}[0-3]):\d{2}(:\d{2})?\b"
- 
-time_pattern = r"\b(?:[01]?\d|2[0-3]):([0-5]?\d)(?:\d?[][APap][Mm])?\b"
-public_url = 'http://64.74.143.76:8800/generate/'
- 
-class SpacyRedactor:
-    def __init__(self):
-        self.nlp = English()
-        self.matcher = Matcher(self.nlp.vocab)
-        self.trigger_patterns = [
-            [{"LOWER": "cvv"}],
-            [{"LOWER": "cvc"}],
-            [{"LOWER": "cvc2"}],
-            [{"LOWER": "cvv2"}],
-            [{"LOWER": "cbb"}],
-            [{"LOWER": "cbb2"}],
-            [{"LOWER": "cbv"}],
-            [{"LOWER": "cbv2"}],
-            [{"LOWER": "cv"}],
-            [{"LOWER": "security"}, {"LOWER": "code"}],
-            [{"LOWER": "verification"}, {"LOWER": "code"}],
-            [{"LOWER": "verification"}, {"LOWER": "value"}],
-            [{"LOWER": "verification"}, {"LOWER": "number"}],
-            [{"LOWER": "three"}, {"LOWER": "numbers"}],
-            [{"LOWER": "three"}, {"LOWER": "digits"}],
-            [{"LOWER": "3"}, {"LOWER": "numbers"}],
-            [{"LOWER": "3"}, {"LOWER": "digits"}],
-            [{"LOWER": "reverse"}],
-            [{"LOWER": "rivers"}],
-            [{"LOWER": "back"}, {"LOWER": "side"}],
-            [{"LOWER": "back"}, {"LOWER": "of"}, {"OP": "*"}]
-        ]
- 
-        for idx, pattern in enumerate(self.trigger_patterns):
-            self.matcher.add(f"cvv_trigger_{idx}", [pattern])
- 
-        self.customer_messages_searched = 0
-        self.cvv_found = False
-        self.redacted = False
- 
- 
-    def _find_numbers_after_match(self, doc, match_end: int) -> Tuple[int, int]:
-        number_count = 0
-        start_idx = None
-        last_num_end = None
-        return_tuple = (None, None)
- 
-        for token in doc[match_end:]:
-            is_number = token.like_num or token.text.isdigit()
- 
-            if is_number:
-                if number_count == 0:
-                    start_idx = token.idx
-                if token.text.isdigit():
-                    number_count += len(token.text)
-                elif token.like_num:
-                    number_count += 1
-                last_num_end = token.idx + len(token.text)
- 
-                if number_count >= 3:
-                    return_tuple = (start_idx, last_num_end)
-            elif number_count> 0 and len(token.text.strip()) > 15:
-                number_count = 0
-                start_idx = None
-            else:
-                for match in re.finditer(time_pattern, token.text):
-                    start_idx = token.idx
-                    last_num_end = token.idx + len(token.text)
-                    return_tuple = (start_idx, last_num_end)
- 
-        return return_tuple
- 
-    def collect_texts(self, texts):
-        collect_texts = []
-        current_speaker = None
-        current_timestamp = None
-        current_text = []
- 
-        for text in texts:
-            next_text = text['transcript']
-            next_speaker = text['channel_tag']
-            next_timestamp = text['timestamp']
-            if next_speaker != current_speaker:
-                if current_speaker is not None:
-                    collect_texts.append(
-                        {
-                            "timestamp": current_timestamp,
-                            "channel_tag": current_speaker,
-                            "transcript": "\n".join(current_text)
-                        }
-                    )
-                current_speaker = next_speaker
-                current_timestamp = next_timestamp
-                current_text = [next_text]
-            else:
-                current_text.append(next_text)
- 
-        if current_speaker is not None:
-            collect_texts.append({
-                "timestamp": current_timestamp,
-                "channel_tag": current_speaker,
-                "transcript": "\n".join(current_text)
-            })
-        return collect_texts
- 
-    def redact_list(self, transcripts_list):
-        cvv_found = False
-        redacted = False
- 
-        for i, text in enumerate(transcripts_list):
-            cvv_found = False
-            if text["channel_tag"] == "customer":
-                continue
-            else:
-                doc = self.nlp(text["transcript"])
-                matches = self.matcher(doc)
-            if len(matches) > 0:
-                cvv_found = True
-                cvv_index = i
- 
-            if cvv_found:
-                customer_messages_searched = 0
-                for customer_text in transcripts_list[cvv_index:]:
-                    if customer_text["channel_tag"] == "agent":
-                        continue
-                    customer_messages_searched += 1
-                    text = customer_text["transcript"]
-                    doc = self.nlp(customer_text["transcript"])
-                    num_start, num_end = self._find_numbers_after_match(doc, 0)
- 
-                    if num_start is not None and num_end is not None:
-                        redacted = True
-                        customer_text["transcript"] = text[:num_start] + "REDACTED" + text[num_end:]
-                        break
- 
-                if customer_messages_searched >= 5:
-                    redacted = True
- 
-        return transcripts_list, redacted
- 
-    def redact_list_new(self, transcripts_dict):
- 
-        text = transcripts_dict
- 
-        if text["channel_tag"] == "agent":
-            doc = self.nlp(text["transcript"])
-            matches = self.matcher(doc)
- 
-            if len(matches) > 0:
-                self.cvv_found = True
-                
-            
-        if self.cvv_found:
-            if text["channel_tag"] == "customer":
-                customer_text = text
-        
-                self.customer_messages_searched += 1
-                temp_text = customer_text["transcript"]
-                doc = self.nlp(customer_text["transcript"])
-                num_start, num_end = self._find_numbers_after_match(doc, 0)
- 
-                if num_start is not None and num_end is not None:
-                    self.redacted = True
-                    self.cvv_found = False
-                    self.customer_messages_searched = 0
-                    customer_text["transcript"] = temp_text[:num_start] + "REDACTED" + temp_text[num_end:]
-                    
- 
-                if self.customer_messages_searched >= 5:
-                    self.redacted = True
-        
- 
-                return transcripts_dict, self.redacted
-        
-        return transcripts_dict, self.redacted
+import logging
+import os
+from sessions import SessionStore, make_session_store
+from call_redactor import CallRedactor
+from redaction_pool import PooledRedactor
+from backend_client import BackendClient, CircuitBreaker
+from batcher import BatchingBackend
+from pipeline import LLMStage, RedactionPipeline, LocalStage, TriggerPrefilter
+from cluster import RedisClientRegistry, make_registry, socketio_options
+from cache import RedactionCache
+from interim import InterimRedactor
+from backpressure import InboundQueue
+from transcripts import MAX_CALL_BYTES, MAX_SENDER_BYTES, WorkerTranscripts, open_worker_store
+import wire
+from metrics import Registry
+from logs import log, setup_logging
+from functools import partial
+from time import perf_counter, sleep, time
+ 
+public_url = os.environ.get('REDACT_BACKEND_URL', 'http://64.74.143.76:8800/generate/')
+ 
+# JSON lines through a bounded queue; per-message events are sampled
+# (LOG_SAMPLE_TEXT is the fraction kept) and never carry transcript text.
+log_handler, log_listener = setup_logging(
+    level=os.environ.get('LOG_LEVEL', 'INFO'),
+    queue_size=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+    sample_rates={'text_redacted': float(os.environ.get('LOG_SAMPLE_TEXT', 0.01))},
+)
+logger = logging.getLogger('local_server')
+ 
+# Served at /metrics in the Prometheus text format, per worker process
+metrics = Registry()
+receive_seconds = metrics.histogram('redaction_stage_seconds', 'Time spent in each redaction stage', stage='receive')
+emit_seconds = metrics.histogram('redaction_stage_seconds', 'Time spent in each redaction stage', stage='emit')
  
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*")
-redactor = SpacyRedactor()
- 
-# Track connected clients
-connected_clients = {}
+# With several workers/nodes, SOCKETIO_MESSAGE_QUEUE (e.g. redis://host:6379/0)
+# lets emits reach sockets held by other processes.
+message_queue = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_options(message_queue))
+# Clients connecting with ?codec=msgpack (and the msgpack package installed)
+# get binary packets and a leaner event schema; the rest keep JSON.
+wire.enable_msgpack(socketio.server)
+CODECS = (wire.JSON, wire.MSGPACK) if wire.MsgPackPacket is not None else (wire.JSON,)
+ 
+# REDACT_POOL_PROCESSES > 0 moves the number scanning off the gevent loop into
+# a pre-warmed process pool; 0 (the default) keeps it inline, which has the
+# higher throughput.  Pool workers importing this file as __mp_main__
+# (python local_server.py) must not start a pool of their own.
+pool_processes = int(os.environ.get('REDACT_POOL_PROCESSES', 0))
+if pool_processes > 0 and __name__ != '__mp_main__':
+    redactor = PooledRedactor(
+        processes=pool_processes,
+        max_pending=int(os.environ.get('REDACT_POOL_MAX_PENDING', 64)),
+    )
+else:
+    redactor = CallRedactor()
+
+def warm_redactor(attempts, backoff):
+    started = perf_counter()
+    for attempt in range(1, attempts + 1):
+        try:
+            redactor.warm()
+            break
+        except Exception as exc:
+            log(logger, logging.WARNING, 'redactor_warm_failed', attempt=attempt, error=str(exc))
+            if attempt < attempts:
+                sleep(backoff * 2 ** (attempt - 1))
+    else:
+        # /ready would answer 503 for good; exit so the orchestrator restarts us
+        log(logger, logging.ERROR, 'redactor_unavailable', attempts=attempts)
+        log_listener.stop()
+        os._exit(1)
+    log(logger, logging.INFO, 'redactor_ready', seconds=round(perf_counter() - started, 3),
+        ready=redactor.ready)
+
+# Warm up while the server starts listening; /ready fails until done.  The
+# warm-up reads the trigger phrases (TRIGGERS_FILE) and, with
+# REDACT_POOL_PROCESSES, starts the pool workers; if either fails it is
+# retried WARMUP_ATTEMPTS times, WARMUP_BACKOFF seconds apart and doubling,
+# before the process exits.  Pool workers start in their own processes, so
+# waiting for them is plain I/O.
+if __name__ != '__mp_main__':
+    warming = gevent.spawn(warm_redactor, int(os.environ.get('WARMUP_ATTEMPTS', 5)),
+                           float(os.environ.get('WARMUP_BACKOFF', 1.0)))
+ 
+# Redaction state per call, shared by the agent and customer sockets of that
+# call.  Those may be held by different workers, so with several of them
+# SESSION_STORE_URL (by default CLIENT_REGISTRY_URL) must be a Redis URL.
+sessions = make_session_store(
+    os.environ.get('SESSION_STORE_URL', os.environ.get('CLIENT_REGISTRY_URL', message_queue)),
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 10000)),
+    idle_timeout=int(os.environ.get('SESSION_IDLE_TIMEOUT', 900)),
+)
+ 
+# Interim (still being spoken) transcript per socket, redacted incrementally
+interims = SessionStore(
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 10000)),
+    idle_timeout=int(os.environ.get('SESSION_IDLE_TIMEOUT', 900)),
+    factory=InterimRedactor,
+)
+ 
+# Final transcripts waiting per socket.  Each socket is redacted one utterance
+# at a time, at most TEXT_RATE per second (bursts of TEXT_BURST); what arrives
+# meanwhile is coalesced, and past TEXT_QUEUE waiting utterances the client
+# is sent 'overloaded' and further text is dropped until it catches up.
+inbound = SessionStore(
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 10000)),
+    idle_timeout=int(os.environ.get('SESSION_IDLE_TIMEOUT', 900)),
+    factory=partial(
+        InboundQueue,
+        rate=float(os.environ.get('TEXT_RATE', 5)),
+        burst=int(os.environ.get('TEXT_BURST', 10)),
+        max_pending=int(os.environ.get('TEXT_QUEUE', 8)),
+        max_chars=int(os.environ.get('TEXT_MAX_CHARS', 2000)),
+    ),
+)
+text_dropped = metrics.counter('text_dropped', 'Final transcripts dropped because the sender was over its limit')
+text_coalesced = metrics.counter('text_coalesced', 'Final transcripts merged into an earlier queued one')
+ 
+# Pooled client for the LLM redaction backend
+backend = BackendClient(
+    public_url,
+    connect_timeout=float(os.environ.get('BACKEND_CONNECT_TIMEOUT', 0.5)),
+    read_timeout=float(os.environ.get('BACKEND_READ_TIMEOUT', 2.0)),
+    max_in_flight=int(os.environ.get('BACKEND_MAX_IN_FLIGHT', 32)),
+    retries=int(os.environ.get('BACKEND_RETRIES', 2)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.environ.get('BACKEND_FAILURE_THRESHOLD', 5)),
+        reset_timeout=float(os.environ.get('BACKEND_RESET_TIMEOUT', 30)),
+    ),
+    metrics=metrics,
+)
+ 
+# Optionally coalesce concurrent utterances into batched /generate/ calls
+# (the backend must accept {"prompts": [...]}); a window of 0 disables it.
+batch_window_ms = float(os.environ.get('BACKEND_BATCH_WINDOW_MS', 0))
+if batch_window_ms > 0:
+    backend = BatchingBackend(
+        backend,
+        window=batch_window_ms / 1000,
+        max_batch=int(os.environ.get('BACKEND_BATCH_SIZE', 16)),
+        max_queue=int(os.environ.get('BACKEND_BATCH_QUEUE', 1024)),
+    )
+    metrics.gauge('backend_batch_queue_depth', 'Utterances waiting for a backend batch',
+                  lambda: backend.batcher.queue_depth)
+ 
+# Redacted turns per call, appended to segment files under TRANSCRIPT_DIR
+# (unset: not kept).  Up to TRANSCRIPT_REPLAY of a call's latest turns are
+# sent to a socket joining it, as one 'transcript_replay' event; a client may
+# ask for fewer with ?replay=N.  Pages are flushed every TRANSCRIPT_SYNC_EVERY
+# turns and every TRANSCRIPT_SYNC_INTERVAL seconds.  Each worker process
+# writes to a worker-N subdirectory of its own, and replays from all of them.
+transcripts = None
+replay = None
+transcript_dir = os.environ.get('TRANSCRIPT_DIR')
+if transcript_dir and __name__ != '__mp_main__':
+    try:
+        transcripts = open_worker_store(
+            transcript_dir,
+            segment_bytes=int(os.environ.get('TRANSCRIPT_SEGMENT_BYTES', 64 * 1024 * 1024)),
+            max_segments=int(os.environ.get('TRANSCRIPT_SEGMENTS', 16)),
+            max_age=float(os.environ.get('TRANSCRIPT_RETENTION', 7 * 24 * 3600)),
+            sync_every=int(os.environ.get('TRANSCRIPT_SYNC_EVERY', 256)),
+        )
+        replay = WorkerTranscripts(transcript_dir, transcripts)
+    except OSError as exc:
+        log(logger, logging.WARNING, 'transcripts_unavailable', error=str(exc))
+replay_turns = int(os.environ.get('TRANSCRIPT_REPLAY', 20))
+
+def sync_transcripts(interval):
+    while True:
+        sleep(interval)
+        try:
+            transcripts.sync()
+            transcripts.enforce_retention()
+        except OSError as exc:
+            log(logger, logging.ERROR, 'transcript_sync_failed', error=str(exc))
+
+if transcripts is not None:
+    gevent.spawn(sync_transcripts, float(os.environ.get('TRANSCRIPT_SYNC_INTERVAL', 1.0)))
+    transcript_errors = metrics.counter('transcript_errors', 'Redacted turns that could not be recorded')
+    metrics.gauge('transcript_segments', 'Transcript segment files kept', lambda: transcripts.segment_count)
+    metrics.gauge('transcript_bytes', 'Bytes of recorded transcripts on disk', lambda: transcripts.size)
+ 
+def socket_alive(sid):
+    # The socket's Engine.IO connection is open and not overdue with a pong
+    eio_sid = socketio.server.manager.eio_sid_from_sid(sid, '/')
+    connection = socketio.server.eio.sockets.get(eio_sid) if eio_sid is not None else None
+    if connection is None or connection.closed:
+        return False
+    return not (connection.last_ping and time() - connection.last_ping > socketio.server.eio.ping_timeout)
+
+def client_expired(sid, client):
+    interims.discard(sid)
+    inbound.discard(sid)
+    log(logger, logging.INFO, 'client_reaped', sid=sid, type=(client or {}).get('type'),
+        call=(client or {}).get('call'))
+    eio_sid = socketio.server.manager.eio_sid_from_sid(sid, '/')
+    if eio_sid is not None:
+        # Engine.IO only notices a half-open connection when it next writes to it
+        gevent.spawn(socketio.server.eio.disconnect, eio_sid)
+
+# Track connected clients, shared across workers when CLIENT_REGISTRY_URL is a
+# Redis URL.  A socket silent for CLIENT_TTL seconds whose connection is gone
+# is dropped with its per-socket state (checked every CLIENT_REAP_INTERVAL);
+# past MAX_CLIENTS live sockets in this process new connections are refused.
+# In Redis, the clients of a worker that died are removed by the others once
+# it has not renewed them for twice CLIENT_TTL.
+connected_clients = make_registry(
+    os.environ.get('CLIENT_REGISTRY_URL', message_queue),
+    max_clients=int(os.environ.get('MAX_CLIENTS', 10000)),
+    ttl=float(os.environ.get('CLIENT_TTL', 60)),
+    alive=socket_alive,
+    on_expire=client_expired,
+)
+connected_clients.sizers += [interims.size_of, inbound.size_of]
+
+def reap_clients(interval):
+    while True:
+        sleep(interval)
+        connected_clients.reap()
 
+if __name__ != '__mp_main__':
+    gevent.spawn(reap_clients, float(os.environ.get('CLIENT_REAP_INTERVAL', 5)))
+
+metrics.gauge('connected_clients', 'Connected Socket.IO clients', lambda: len(connected_clients))
+metrics.gauge('clients_refused', 'Connections refused because this process was at MAX_CLIENTS',
+              lambda: connected_clients.refused)
+metrics.gauge('clients_reaped', 'Clients dropped after their heartbeat stopped', lambda: connected_clients.reaped)
+if isinstance(connected_clients, RedisClientRegistry):
+    metrics.gauge('clients_orphans_reaped', 'Clients of exited workers removed from the shared registry',
+                  lambda: connected_clients.orphans_reaped)
+metrics.gauge('session_memory_bytes', 'Estimated bytes held for the sockets of this process',
+              lambda: connected_clients.memory()[0])
+metrics.gauge('session_memory_max_bytes', 'Estimated bytes held for the largest socket of this process',
+              lambda: connected_clients.memory()[1])
+metrics.gauge('log_records_dropped', 'Log records dropped because the log queue was full',
+              lambda: log_handler.dropped)
+metrics.gauge('active_sessions', 'Calls with redaction state in this process', lambda: len(sessions))
+if isinstance(redactor, PooledRedactor):
+    metrics.gauge('redaction_pool_pending', 'Calls queued or running in the redaction pool',
+                  lambda: redactor.pending)
+ 
 @app.route('/')
 def index():
     return 'Server is running'
  
+@app.route('/ready')
+def ready():
+    # For load balancer / readiness probes; '/' only says the process is up
+    if redactor.ready:
+        return 'Ready'
+    return Response('Warming up', status=503)
+ 
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+ 
+def ids_fit(client_type, call_id):
+    # Both are client-chosen and end up in transcript records, which cap them
+    return (len(client_type.encode('utf-8', 'surrogatepass')) <= MAX_SENDER_BYTES
+            and len(call_id.encode('utf-8', 'surrogatepass')) <= MAX_CALL_BYTES)
+ 
 @socketio.on('connect')
 def handle_connect():
     client_id = request.sid
     client_type = request.args.get('type', 'customer')  # Default to customer
-    connected_clients[client_id] = {
+    # Agent and customer of one call share this, and get each other's chat
+    # messages through the call's room; a socket without one is a call of its own.
+    call_id = request.args.get('call', client_id)
+    codec = wire.negotiate(request.args.get('codec'))
+    if not ids_fit(client_type, call_id):
+        log(logger, logging.WARNING, 'client_refused', sid=client_id, reason='id too long',
+            type_chars=len(client_type), call_chars=len(call_id))
+        raise ConnectionRefusedError('Client type or call id too long')
+    admitted = connected_clients.admit(client_id, {
         'type': client_type,
-        'id': client_id
-    }
-    print(f"Client connected: {client_id} as {client_type}")
-    print(f"All connected clients: {connected_clients}")
+        'id': client_id,
+        'call': call_id,
+        'codec': codec
+    })
+    if not admitted:
+        log(logger, logging.WARNING, 'client_refused', sid=client_id, type=client_type, call=call_id,
+            clients=connected_clients.local_count)
+        raise ConnectionRefusedError('Server is full')
+    join_room(wire.codec_room(call_id, codec))
+    log(logger, logging.INFO, 'client_connected', sid=client_id, type=client_type, call=call_id)
+    if replay is not None and 'call' in request.args:
+        # A reconnecting socket catches up on what was said meanwhile
+        count = min(replay_turns, request.args.get('replay', replay_turns, type=int))
+        try:
+            turns = replay.last(call_id, count)
+        except OSError as exc:
+            log(logger, logging.ERROR, 'transcript_replay_failed', sid=client_id, call=call_id, error=str(exc))
+            turns = []
+        if turns:
+            emit('transcript_replay', [wire.chat_message(codec, turn.sender, turn.text) for turn in turns])
  
 @socketio.on('disconnect')
 def handle_disconnect():
     client_id = request.sid
-    if client_id in connected_clients:
-        print(f"Client disconnected: {client_id} ({connected_clients[client_id]['type']})")
-        print(f"Before disconnect - connected clients: {connected_clients}")
+    client = connected_clients.get(client_id)
+    if client is not None:
         del connected_clients[client_id]
-        print(f"After disconnect - connected clients: {connected_clients}")
+        log(logger, logging.INFO, 'client_disconnected', sid=client_id, type=client['type'], call=client['call'])
+    interims.discard(client_id)
+    inbound.discard(client_id)
+ 
+def redact_locally(call_id, client_type, text):
+    if not redactor.ready:
+        # Calls during start-up wait for the warm-up instead of racing it
+        warming.get()
+    transcript = {"channel_tag": client_type, "transcript": text}
+    state = sessions.get(call_id)
+    redacted_transcript, was_redacted = redactor.redact_list_new(transcript, state)
+    sessions.save(call_id, state)
+    return redacted_transcript["transcript"]
+ 
+# Backend answers for repeated (scripted) lines; REDACTION_CACHE_BYTES=0 disables it
+cache_bytes = int(os.environ.get('REDACTION_CACHE_BYTES', 16 * 1024 * 1024))
+redaction_cache = RedactionCache(
+    max_bytes=cache_bytes,
+    ttl=float(os.environ.get('REDACTION_CACHE_TTL', 3600)),
+) if cache_bytes > 0 else None
+ 
+# Cheapest stage first; the LLM falls back to the local result while the backend is down
+pipeline = RedactionPipeline([
+    TriggerPrefilter.from_triggers(redactor.triggers),
+    LocalStage(redact_locally),
+    LLMStage(backend, redaction_cache),
+], metrics=metrics)
+if redaction_cache is not None:
+    metrics.gauge('redaction_cache_entries', 'Entries in the backend result cache', lambda: len(redaction_cache))
+    metrics.gauge('redaction_cache_bytes', 'Estimated bytes held by the backend result cache',
+                  lambda: redaction_cache.size)
+    metrics.gauge('redaction_cache_hits', 'Backend results served from the cache', lambda: redaction_cache.hits)
+    metrics.gauge('redaction_cache_misses', 'Cache lookups that had to call the backend',
+                  lambda: redaction_cache.misses)
+    metrics.gauge('redaction_cache_evictions', 'Cache entries dropped to stay under REDACTION_CACHE_BYTES',
+                  lambda: redaction_cache.evictions)
+    metrics.gauge('redaction_cache_expirations', 'Cache entries dropped after REDACTION_CACHE_TTL',
+                  lambda: redaction_cache.expirations)
  
 @socketio.on('text')
 def handle_text(data):
-    text = data.get('text', '')
+    received = perf_counter()
+    text = wire.incoming_text(data)
     client_id = request.sid
-    client_type = connected_clients.get(client_id, {}).get('type', 'customer')
-    
-    print(f"Message received from client {client_id} ({client_type})")
-    print(f"Current connected clients: {connected_clients}")
+    connected_clients.touch(client_id)
+    client = connected_clients.get(client_id, {})
+    client_type = client.get('type', 'customer')
+    call_id = client.get('call', client_id)
+    codec = client.get('codec', wire.JSON)
     
-    # Create a simple transcript structure for the redactor
-    transcript = [{
-            #    "timestamp": 1,
-                ##"channel_tag": "agent",
-                ##"transcript": "Can I have your CVV?"
-
-                # "channel_tag": client_type,
-                "role": client_type,
-                "content": text
-               }]
-    
-
     # user_input = [{'role':'Agent','content':'What are the 3 numbers next to the signature strip of your card'},
     #             {'role':'Customer','content':'let me check, it is 3:52'}]
 
     # vpn_url = "http://172.16.0.11:8800/generate/"
 
-    data = {"prompt": transcript, "max_tokens": 32, "temperature": 0.2}
-    print(data)
-    response = requests.post(public_url, json=data)
-    print(response.json())
+    receive_seconds.since(received)
+    queue = inbound.get(client_id)
+    was_overloaded = queue.overloaded
+    if not queue.put(text):
+        text_dropped.inc()
+        if not was_overloaded:
+            emit('overloaded', {'queued': len(queue), 'dropped': queue.dropped})
+        return
+    if queue.draining:
+        # The handler already draining this socket's queue will send it
+        return
+    queue.draining = True
+    try:
+        while queue:
+            delay = queue.bucket.take()
+            if delay:
+                sleep(delay)
+            queued = len(queue)
+            text = queue.take()
+            text_coalesced.inc(queued - len(queue) - 1)
+            redact_and_emit(client_id, client_type, call_id, codec, text)
+    finally:
+        queue.draining = False
+ 
+def redact_and_emit(client_id, client_type, call_id, codec, text):
+    # Apply redaction: prefilter, then the local redactor, then the LLM only for what is left
+    redacted_text = pipeline.redact(call_id, client_type, text)
     
-    # Apply redaction
-    # redacted_transcript, was_redacted = redactor.redact_list_new(transcript)
+    # Log the redaction (sampled; lengths only, never the text)
+    log(logger, logging.INFO, 'text_redacted', sid=client_id, type=client_type, call=call_id,
+        chars=len(text), changed=redacted_text != text)
     
-    # Get the redacted customer text
-    #redacted_text = redacted_transcript[1]["transcript"] if was_redacted else text
-    redacted_text = response.json() #redacted_transcript["transcript"] if was_redacted else text
-    
-    # Log the redaction
-    print(f"Original: {text}")
-    print(f"Redacted: {redacted_text}")
-    # print(f"Was redacted: {was_redacted}")
+    # The final transcript supersedes whatever interim was shown
+    interims.discard(client_id)
     
     # Send back to originating client
-    emit('redacted_text', {'redacted_text': redacted_text})
+    emitting = perf_counter()
+    emit('redacted_text', wire.redacted_text(codec, redacted_text))
+    
+    # Send to the counterpart in the same call (except sender), in each codec's schema
+    for each in CODECS:
+        emit('chat_message', wire.chat_message(each, client_type, redacted_text),
+             to=wire.codec_room(call_id, each), include_self=False)
+    emit_seconds.since(emitting)
     
-    # Broadcast to all clients (except sender)
-    emit('chat_message', {
-        'sender_type': client_type,
-        'message': f"{client_type}: {redacted_text}"    
-    }, broadcast=True, include_self=False)
+    # Recorded after the call has seen it; a failure costs the replay, not the turn
+    if transcripts is not None:
+        try:
+            transcripts.append(call_id, client_type, redacted_text)
+        except (OSError, ValueError) as exc:
+            transcript_errors.inc()
+            log(logger, logging.ERROR, 'transcript_append_failed', sid=client_id, call=call_id, error=str(exc))
+ 
+@socketio.on('interim_text')
+def handle_interim_text(data):
+    client_id = request.sid
+    connected_clients.touch(client_id)
+    client = connected_clients.get(client_id, {})
+    delta = interims.get(client_id).update(wire.incoming_text(data))
+    if delta is None:
+        return
+    offset, replacement = delta
+    # Everyone in the call, sender included, patches its copy of the interim
+    for each in CODECS:
+        emit('redacted_interim', wire.redacted_interim(each, client.get('type', 'customer'), offset, replacement),
+             to=wire.codec_room(client.get('call', client_id), each))
  
 if __name__ == '__main__':
     # Keep the existing test code if needed for debugging
@@ -0,0 +1,141 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Fields that may carry what the customer said; only their length is logged
+PII_FIELDS = frozenset({'text', 'transcript', 'message', 'redacted_text', 'original', 'redacted'})
+
+
+def safe_fields(fields):
+    return {
+        key: {'len': len(value)} if key in PII_FIELDS and isinstance(value, str) else value
+        for key, value in fields.items()
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event and the record's fields.
+
+    Pass fields as ``extra={'fields': {...}}``; see ``log()``.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(safe_fields(fields))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class Sampler(logging.Filter):
+    """Keeps only a fraction of the records for some events, e.g. {'text': 0.01}.
+
+    ``log()`` samples before a record is even created; this catches plain
+    logger calls for the same events.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if getattr(record, 'sampled', False):
+            return True
+        rate = self.rates.get(record.msg)
+        return rate is None or random.random() < rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler for a bounded queue that drops records instead of blocking.
+
+    Records are queued unformatted; the listener formats them off the
+    request path.
+    """
+
+    def __init__(self, queue_):
+        super().__init__(queue_)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to the BatchingListener."""
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingListener(QueueListener):
+    """Writes queued records in the background, flushing once the queue is drained."""
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+# Event -> fraction of records kept, set by setup_logging
+_sample_rates = {}
+
+
+def log(logger, level, event, **fields):
+    # The fields become top-level keys of the JSON line
+    rate = _sample_rates.get(event)
+    if rate is not None and random.random() >= rate:
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields, 'sampled': True})
+
+
+def setup_logging(level='INFO', queue_size=10000, sample_rates=None, stream=None):
+    """Route the root logger through a bounded queue to a background JSON writer.
+
+    Returns the DroppingQueueHandler (for its ``dropped`` count) and the
+    started BatchingListener.  Under gevent's monkey patching the listener is
+    a greenlet: formatting and writing still leave the handlers, but share
+    the event loop.
+    """
+    records = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(records)
+    _sample_rates.clear()
+    _sample_rates.update(sample_rates or {})
+    handler.addFilter(Sampler(_sample_rates))
+    writer = BufferedStreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers[:] = [handler]
+    listener = BatchingListener(records, writer)
+    listener.start()
+    atexit.register(_stop, listener)
+    return handler, listener
+
+
+def _stop(listener):
+    # Writes out what is still queued; stop() may already have been called
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,178 @@
+import re
+from time import perf_counter
+
+from backend_client import BackendUnavailable
+from digits import NUMBER_WORDS
+from metrics import Registry
+from redaction_pool import RedactorBusy
+
+# Words that make an utterance worth a closer look even without numbers
+EMAIL_WORDS = {'email', 'mail', 'gmail', 'dot'}
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+class Utterance:
+    __slots__ = ('call_id', 'role', 'text', 'redacted')
+
+    def __init__(self, call_id, role, text):
+        self.call_id = call_id
+        self.role = role
+        self.text = text
+        self.redacted = text
+
+
+class StageStats:
+    __slots__ = ('name', 'calls', 'resolved')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.resolved = 0
+
+    @property
+    def hit_rate(self):
+        return self.resolved / self.calls if self.calls else 0.0
+
+    def as_dict(self):
+        return {'calls': self.calls, 'resolved': self.resolved, 'hit_rate': self.hit_rate}
+
+
+class RedactionPipeline:
+    """Runs an utterance through increasingly expensive stages.
+
+    A stage is any callable taking an Utterance.  It returns True once
+    ``utterance.redacted`` is final, or False to pass the utterance on to the
+    next stage.  Whatever reaches the end of the list is returned as is.
+
+    Stage latencies and counts go to ``metrics`` (a metrics.Registry).
+    """
+
+    def __init__(self, stages, metrics=None):
+        self.stages = stages
+        self.stats = [StageStats(getattr(stage, 'name', type(stage).__name__)) for stage in stages]
+        registry = metrics if metrics is not None else Registry()
+        self.latency = [
+            registry.histogram('redaction_stage_seconds', 'Time spent in each redaction stage', stage=stats.name)
+            for stats in self.stats
+        ]
+        self.utterances = registry.counter('redaction_utterances', 'Utterances run through the redaction pipeline')
+        self.redactions = registry.counter('redactions', 'Utterances that came out of the pipeline changed')
+
+    def redact(self, call_id, role, text):
+        utterance = Utterance(call_id, role, text)
+        self.utterances.value += 1
+        for stage, stats, latency in zip(self.stages, self.stats, self.latency):
+            stats.calls += 1
+            start = perf_counter()
+            final = stage(utterance)
+            latency.observe(perf_counter() - start)
+            if final:
+                stats.resolved += 1
+                break
+        if utterance.redacted != text:
+            self.redactions.value += 1
+        return utterance.redacted
+
+    def report(self):
+        return {stats.name: stats.as_dict() for stats in self.stats}
+
+
+class TriggerPrefilter:
+    """Near-free first stage: lets through utterances with nothing to redact.
+
+    An utterance needs a closer look when it has an '@', an email word, a
+    word that can start a CVV trigger, or at least three digits/number words
+    (the least the redactors act on).  Agent turns that only carry a trigger
+    move on too, since the local stage has to see them to arm the call.
+
+    With ``triggers`` (a triggers.TriggerDictionary) the trigger words follow
+    edits to the phrase file.
+    """
+
+    name = 'prefilter'
+
+    def __init__(self, keywords, min_digits=3, triggers=None):
+        self.keywords = frozenset(keywords) | EMAIL_WORDS
+        self.min_digits = min_digits
+        self.triggers = triggers
+
+    @classmethod
+    def from_triggers(cls, triggers):
+        return cls((), triggers=triggers)
+
+    def needs_review(self, text):
+        text = text.lower()
+        if '@' in text:
+            return True
+        digits = 0
+        trigger_words = self.triggers.first_words() if self.triggers is not None else ()
+        for word in _WORD.findall(text):
+            if word in self.keywords or word in trigger_words:
+                return True
+            if word in NUMBER_WORDS:
+                digits += 1
+            elif not word.isalpha():
+                digits += sum(char.isdigit() for char in word)
+            if digits >= self.min_digits:
+                return True
+        return False
+
+    def __call__(self, utterance):
+        return not self.needs_review(utterance.text)
+
+
+class LocalStage:
+    """Runs the call-aware redactor (call_redactor.CallRedactor) in process.
+
+    Final when it redacted something, or when the utterance has no numbers
+    or email hints left that the LLM could still find something in.  If the
+    redaction process pool is saturated the utterance goes to the LLM.
+    """
+
+    name = 'local'
+
+    def __init__(self, redact):
+        # redact(call_id, role, text) -> redacted text
+        self.redact = redact
+        self.residual = TriggerPrefilter(())
+
+    def __call__(self, utterance):
+        try:
+            utterance.redacted = self.redact(utterance.call_id, utterance.role, utterance.text)
+        except RedactorBusy:
+            return False
+        if utterance.redacted != utterance.text:
+            return True
+        return not self.residual.needs_review(utterance.text)
+
+
+class LLMStage:
+    """The /generate/ backend; keeps the previous stage's result if it is unavailable.
+
+    Its answer only depends on role and text, so results can be kept in an
+    optional cache.RedactionCache.
+    """
+
+    name = 'llm'
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache
+        self.errors = 0
+
+    def __call__(self, utterance):
+        if self.cache is not None:
+            cached = self.cache.get(utterance.role, utterance.text)
+            if cached is not None:
+                utterance.redacted = cached
+                return True
+        transcript = [{"role": utterance.role, "content": utterance.text}]
+        try:
+            utterance.redacted = self.backend.generate(transcript)
+        except BackendUnavailable:
+            self.errors += 1
+            return True
+        if self.cache is not None:
+            self.cache.put(utterance.role, utterance.text, utterance.redacted)
+        return True
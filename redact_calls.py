@@ -0,0 +1,195 @@
+"""Offline redaction of stored call transcripts.
+
+    python redact_calls.py calls.jsonl.gz -o redacted.jsonl [--processes 4] [--chunksize 16] [--resume]
+
+Input is JSONL, gzip-compressed if the name ends in .gz ("-" reads stdin).
+Each line is one turn, {"call_id", "timestamp", "channel_tag",
+"transcript"}, with the turns of a call on consecutive lines; a line may
+also hold a whole call as {"call_id", "transcripts": [...]}.
+
+Output has one line per call, in input order:
+{"call_id", "redacted", "transcripts": [...]}, where consecutive turns of
+one speaker are merged as in CallRedactor.collect_texts.
+
+Calls are redacted in a process pool.  Only a bounded number of calls are
+in flight at any time, so memory stays flat however large the input is.
+A call that fails to redact (a turn missing a field, say) is reported on
+stderr and left out of the output.  With --resume, a run picks up after
+the last checkpoint written to <output>.checkpoint.
+"""
+import argparse
+import collections
+import gzip
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from call_redactor import CallRedactor
+
+# One redactor per worker process, built by the pool initializer
+_redactor = None
+
+
+def _init_worker():
+    global _redactor
+    _redactor = CallRedactor()
+
+
+def _redact_call(call):
+    # (redacted, output line), or (None, error message) for a call that failed
+    call_id, turns = call
+    try:
+        transcripts, redacted = _redactor.redact_list(list(_redactor.iter_collect_texts(turns)))
+        # Serialized here so the parent only has to write bytes
+        line = json.dumps({'call_id': call_id, 'redacted': redacted, 'transcripts': transcripts}) + '\n'
+    except Exception as exc:
+        return None, f'call {call_id!r}: {type(exc).__name__}: {exc}'
+    return redacted, line.encode()
+
+
+def _redact_chunk(calls):
+    return [_redact_call(call) for call in calls]
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def read_calls(lines, call_key='call_id'):
+    """Yield (call_id, turns) for each call in a stream of JSONL lines."""
+    records = (json.loads(line) for line in lines if line.strip())
+    for call_id, group in itertools.groupby(records, key=lambda record: record.get(call_key)):
+        turns = []
+        for record in group:
+            if 'transcripts' in record:
+                yield call_id, record['transcripts']
+            else:
+                turns.append(record)
+        if turns:
+            yield call_id, turns
+
+
+class Checkpoint:
+    """Calls done so far (written or skipped) and the output size at that point."""
+
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+        self.offset = 0
+
+    def load(self):
+        try:
+            with open(self.path) as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            return self
+        self.calls = state['calls']
+        self.offset = state['offset']
+        return self
+
+    def save(self, calls, output):
+        output.flush()
+        os.fsync(output.fileno())
+        self.calls = calls
+        self.offset = output.tell()
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as handle:
+            json.dump({'calls': self.calls, 'offset': self.offset}, handle)
+        os.replace(tmp, self.path)
+
+
+def open_output(path, checkpoint):
+    if path == '-':
+        return sys.stdout.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wb')
+    output = open(path, 'r+b' if checkpoint.offset else 'wb')
+    # Anything after the checkpoint is redone
+    output.truncate(checkpoint.offset)
+    output.seek(checkpoint.offset)
+    return output
+
+
+def redact_calls(calls, processes, chunksize):
+    """_redact_call's result for each of ``calls``, in order."""
+    if processes == 0:
+        _init_worker()
+        yield from map(_redact_call, calls)
+        return
+    # Chunks are submitted from this thread, a window at a time, so nothing
+    # blocks the pool's own threads and reading waits for results
+    calls = iter(calls)
+    chunks = iter(lambda: list(itertools.islice(calls, chunksize)), [])
+    window = collections.deque()
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        for chunk in chunks:
+            window.append(pool.apply_async(_redact_chunk, (chunk,)))
+            if len(window) >= processes * 4:
+                yield from window.popleft().get()
+        while window:
+            yield from window.popleft().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Redact stored call transcripts (JSONL, optionally gzip).')
+    parser.add_argument('input', help='JSONL or .jsonl.gz file, or - for stdin')
+    parser.add_argument('-o', '--output', default='-', help='output JSONL file (default stdout)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='worker processes, 0 to run inline')
+    parser.add_argument('--chunksize', type=int, default=16, help='calls sent to a worker at a time')
+    parser.add_argument('--call-key', default='call_id', help='field holding the call id')
+    parser.add_argument('--resume', action='store_true', help='continue from <output>.checkpoint')
+    parser.add_argument('--checkpoint-every', type=int, default=1000, help='calls between checkpoints')
+    parser.add_argument('--report-every', type=float, default=10.0, help='seconds between progress lines')
+    args = parser.parse_args(argv)
+
+    # Resuming truncates the output back to the checkpoint, so plain files only
+    checkpointing = args.output != '-' and not args.output.endswith('.gz')
+    checkpoint = Checkpoint(args.output + '.checkpoint')
+    if args.resume:
+        if not checkpointing:
+            parser.error('--resume needs an uncompressed output file')
+        checkpoint.load()
+
+    started = last_report = time.monotonic()
+    skipped = done = checkpoint.calls
+    redacted = failed = 0
+    with open_input(args.input) as lines:
+        calls = itertools.islice(read_calls(lines, args.call_key), skipped, None)
+        output = open_output(args.output, checkpoint)
+        try:
+            for was_redacted, line in redact_calls(calls, args.processes, args.chunksize):
+                done += 1
+                if was_redacted is None:
+                    failed += 1
+                    print(f"Skipped {line}", file=sys.stderr)
+                else:
+                    output.write(line)
+                    redacted += was_redacted
+                if checkpointing and done % args.checkpoint_every == 0:
+                    checkpoint.save(done, output)
+                now = time.monotonic()
+                if now - last_report >= args.report_every:
+                    last_report = now
+                    rate = (done - skipped) / (now - started)
+                    print(f"{done} calls, {rate:.0f} calls/sec", file=sys.stderr)
+            if checkpointing:
+                checkpoint.save(done, output)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {done - skipped} calls ({redacted} redacted, {failed} skipped) in {elapsed:.1f}s, "
+          f"{(done - skipped) / elapsed:.0f} calls/sec; {done} in total", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
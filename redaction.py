@@ -0,0 +1,184 @@
+import re
+
+import digits
+from triggers import default_dictionary
+
+# CVV variations and common mispronunciations, shared with local_server.py
+# through triggers.txt and matched on whole words
+CVV_TRIGGERS = default_dictionary()
+
+CARD_LABELS = {'visa': 'VISA', 'mastercard': 'MC', 'amex': 'AMEX'}
+
+
+class Rule:
+    """A plain substitution, applied with a single precompiled ``subn``."""
+
+    __slots__ = ('pattern', 'replacement')
+
+    def __init__(self, pattern, replacement, flags=0):
+        self.pattern = re.compile(pattern, flags)
+        self.replacement = replacement
+
+    def apply(self, text):
+        return self.pattern.subn(self.replacement, text)
+
+
+class ContextRule:
+    """Equivalent of ``re.sub('A.*?B.*?C', ...)`` that runs in linear time.
+
+    Python's backtracking engine retries every lazy ``.*?`` gap from every
+    position where ``A`` matches, which is quadratic when the tail never
+    shows up.  Here each segment is searched once from the end of the
+    previous one, searches are memoised while the scan moves forward, and a
+    failed start skips straight to the next line (``.`` never crosses a
+    newline, so no later start on the same line can succeed either).
+
+    This relies on a segment never being able to start inside the text
+    matched by the segment before it (keywords vs digits), which holds for
+    every rule below.  The replacement is expanded against the last segment,
+    which is where the capturing groups live.
+    """
+
+    __slots__ = ('segments', 'replacement')
+
+    def __init__(self, segments, replacement, flags=0):
+        self.segments = [re.compile(segment, flags) for segment in segments]
+        self.replacement = replacement
+
+    def apply(self, text):
+        segments = self.segments
+        last = len(segments) - 1
+        # Memoised (searched_from, match) per segment
+        cache = [(-1, None)] * len(segments)
+
+        def search(index, pos):
+            searched_from, match = cache[index]
+            if searched_from != -1 and searched_from <= pos and (match is None or pos <= match.start()):
+                return match
+            match = segments[index].search(text, pos)
+            cache[index] = (pos, match)
+            return match
+
+        pieces = []
+        count = 0
+        copied = 0
+        pos = 0
+        length = len(text)
+        while pos <= length:
+            head = search(0, pos)
+            if head is None:
+                break
+            end = head.end()
+            match = head
+            for index in range(1, last + 1):
+                line_end = text.find('\n', end)
+                match = search(index, end)
+                if match is None or (line_end != -1 and match.start() > line_end):
+                    match = None
+                    break
+                end = match.end()
+
+            if match is None:
+                line_end = text.find('\n', head.start())
+                if line_end == -1:
+                    break
+                pos = line_end + 1
+                continue
+
+            pieces.append(text[copied:head.start()])
+            pieces.append(match.expand(self.replacement))
+            copied = pos = end
+            count += 1
+
+        if not count:
+            return text, 0
+        pieces.append(text[copied:])
+        return ''.join(pieces), count
+
+
+class DigitRule:
+    """Masks the digit runs found by digits.scan, by kind, in one pass.
+
+    Cards (Luhn- and BIN-checked) keep their last four digits; phone
+    numbers and any other run of five or more digits (SSNs, 7-digit
+    numbers, partial card numbers) are masked.  A run of three or four
+    digits is a CVV when a phrase from ``triggers`` (a
+    triggers.TriggerDictionary) or a card is on the same line, and is kept
+    otherwise, like years, prices and counts.  Times and one- or two-digit
+    numbers are kept.  Spoken numbers count too.
+    """
+
+    __slots__ = ('triggers',)
+
+    def __init__(self, triggers):
+        self.triggers = triggers
+
+    def label(self, run, cvv_context=False):
+        if run.kind == digits.CARD:
+            return f'[{CARD_LABELS.get(run.brand, "CARD")} ENDING IN {run.digits[-4:]}]'
+        if run.kind == digits.PHONE:
+            return '[PHONE]'
+        if run.kind == digits.CVV:
+            return '[CVV]' if cvv_context else None
+        if run.kind == digits.NUMBER and len(run.digits) >= 3:
+            return '[NUMBER]'
+        return None
+
+    def apply(self, text):
+        pieces = []
+        copied = 0
+        found = None
+        card_line = -1
+        for run in digits.scan(text):
+            cvv_context = False
+            if run.kind == digits.CVV:
+                if found is None:
+                    # Most texts have no CVV-sized run, so only these pay for the lookup
+                    found = self.triggers.find(text)
+                cvv_context = _in_context(text, run, found, card_line)
+            label = self.label(run, cvv_context)
+            if run.kind == digits.CARD:
+                card_line = text.rfind('\n', 0, run.start) + 1
+            if label is not None:
+                pieces.append(text[copied:run.start])
+                pieces.append(label)
+                copied = run.end
+        if not pieces:
+            return text, 0
+        pieces.append(text[copied:])
+        return ''.join(pieces), len(pieces) // 2
+
+
+def _in_context(text, run, triggers, card_line):
+    # A trigger phrase or an earlier card on the line of ``run``
+    line_start = text.rfind('\n', 0, run.start) + 1
+    if card_line == line_start:
+        return True
+    line_end = text.find('\n', run.end)
+    if line_end == -1:
+        line_end = len(text)
+    return any(
+        line_start <= match.start() and match.end() <= line_end
+        and (match.end() <= run.start or run.end <= match.start())
+        for match in triggers
+    )
+
+
+# Order matters: every rule sees the output of the ones before it.
+RULES = [
+    # Cards, CVVs, phone numbers and other long numbers, spoken or written
+    DigitRule(CVV_TRIGGERS),
+
+    # Redact email addresses with variations
+    # The lookbehind starts a match only where an address can begin; without
+    # it a long run of address characters and no '@' is quadratic
+    Rule(r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL]'),  # Standard email
+    ContextRule([r'(?:email|e-mail|mail)', r'@', r'\.[a-z]{2,}'], '[EMAIL]', flags=re.I),  # Spoken email addresses
+    ContextRule([r'(?:at|@)', r'(?:dot|\.)\s*[a-z]{2,}'], '[EMAIL]', flags=re.I),  # Spelled out email addresses
+]
+
+
+def redact_text(text, rules=RULES):
+    for rule in rules:
+        text, _ = rule.apply(text)
+    return text
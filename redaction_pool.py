@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+
+from call_redactor import CallRedactor
+
+# One redactor per worker process, built by the pool initializer
+_redactor = None
+
+
+def _init_worker():
+    global _redactor
+    _redactor = CallRedactor()
+    _redactor.warm()
+    threading.Thread(target=_exit_with_parent, args=(os.getppid(),), daemon=True).start()
+
+
+def _exit_with_parent(parent_pid):
+    # Workers blocked on the call queue do not notice a killed server
+    while os.getppid() == parent_pid:
+        time.sleep(1)
+    os._exit(0)
+
+
+def _warm():
+    # Long enough that each warm-up task lands on a different worker
+    time.sleep(0.2)
+    return os.getpid()
+
+
+def _number_span(text):
+    return _redactor.number_span(text)
+
+
+class RedactorBusy(Exception):
+    """Too many redactions are already queued for the process pool."""
+
+
+class PooledRedactor(CallRedactor):
+    """CallRedactor whose number scan runs in worker processes.
+
+    Only the number scan (number_span) is sent to the pool; trigger
+    lookup is a cheap automaton pass and per-call state stays in this
+    process, so redact_list_new behaves exactly as before.  Pickling each
+    utterance costs throughput, so this only pays when keeping the gevent
+    loop responsive under load matters more (bench_pool_responsiveness).  Waiting on a result blocks only the calling greenlet:
+    the pool's bookkeeping thread is a greenlet under gevent's monkey
+    patching and the workers are separate ``spawn``-ed processes.
+
+    At most ``max_pending`` calls are queued or running; beyond that a call
+    waits up to ``acquire_timeout`` for a slot and then raises RedactorBusy.
+    """
+
+    def __init__(self, processes=2, max_pending=64, acquire_timeout=0.1, timeout=2.0):
+        super().__init__()
+        self.processes = processes
+        self.acquire_timeout = acquire_timeout
+        self.timeout = timeout
+        self.pending = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.executor = ProcessPoolExecutor(
+            processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+
+    def warm(self, timeout=60):
+        # Read the trigger phrases and start every worker before the first real call
+        self.triggers.load()
+        futures = [self.executor.submit(_warm) for _ in range(self.processes)]
+        wait(futures, timeout=timeout)
+        pids = {future.result() for future in futures if future.done()}
+        self.warmed = len(pids) == self.processes
+        if not self.warmed:
+            raise RedactorBusy(f'{len(pids)} of {self.processes} pool workers started')
+        return pids
+
+    def number_span(self, text):
+        return self._call(_number_span, text)
+
+    def _call(self, fn, text):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise RedactorBusy('redaction pool queue is full')
+        self.pending += 1
+        try:
+            return self.executor.submit(fn, text).result(timeout=self.timeout)
+        except TimeoutError:
+            raise RedactorBusy('redaction pool timed out') from None
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
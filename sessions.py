@@ -0,0 +1,199 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+_CONTAINERS = (list, tuple, deque, set, frozenset)
+
+
+def approx_size(obj):
+    """Bytes of ``obj`` plus the values it holds directly, and their items.
+
+    Enough for the small, flat per-session objects kept here (dicts of
+    strings, ``__slots__`` classes holding strings, lists and deques);
+    functions and other shared objects it refers to are not counted.
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, dict):
+        values = list(obj.keys()) + list(obj.values())
+    elif hasattr(obj, '__slots__'):
+        values = [getattr(obj, name, None) for name in obj.__slots__]
+    else:
+        values = list(getattr(obj, '__dict__', {}).values())
+    size = sys.getsizeof(obj)
+    for value in values:
+        if value is None or callable(value):
+            continue
+        size += sys.getsizeof(value)
+        if isinstance(value, _CONTAINERS):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class SessionState:
+    """Conversation state for one call, as used by CallRedactor.redact_list_new."""
+
+    __slots__ = ('cvv_found', 'customer_messages_searched', 'redacted', 'last_seen')
+
+    def __init__(self, now=0.0):
+        self.cvv_found = False
+        self.customer_messages_searched = 0
+        self.redacted = False
+        self.last_seen = now
+
+
+class SessionStore:
+    """Per-call SessionState keyed by call/room id.
+
+    Entries are kept in least-recently-used order, so lookups, idle eviction
+    and the hard cap are all O(1) per session.  With ``__slots__`` every state
+    has the same small, fixed size, so ``max_sessions`` is a hard memory cap.
+
+    ``factory(now)`` builds missing entries; anything with a ``last_seen``
+    attribute works.
+    """
+
+    def __init__(self, max_sessions=10000, idle_timeout=900, clock=time.monotonic, factory=SessionState):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.factory = factory
+        self.evicted = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None:
+                self._evict_idle(now)
+                while len(self._sessions) >= self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+                state = self._sessions[key] = self.factory(now)
+            else:
+                self._sessions.move_to_end(key)
+            state.last_seen = now
+            return state
+
+    def save(self, key, state):
+        # get() hands out the live entry, so there is nothing to write back
+        pass
+
+    def discard(self, key):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def size_of(self, key):
+        # approx_size of the entry, without counting as a use of it
+        return approx_size(self._sessions.get(key))
+
+    def evict_idle(self):
+        with self._lock:
+            return self._evict_idle(self.clock())
+
+    def _evict_idle(self, now):
+        evicted = 0
+        deadline = now - self.idle_timeout
+        while self._sessions:
+            state = next(iter(self._sessions.values()))
+            if state.last_seen > deadline:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def __contains__(self, key):
+        return key in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class _StoredState(SessionState):
+    # What RedisSessionStore.get read, so save writes back only what changed
+    __slots__ = ('stored',)
+
+
+class RedisSessionStore:
+    """Per-call SessionState in Redis, for the workers of one deployment.
+
+    The agent and customer sockets of a call may sit on different workers;
+    with the state here, a trigger seen by one arms the redaction on the
+    other.  ``get`` reads a copy of the call's hash and ``save`` writes back
+    only the fields that changed since, in one MULTI/EXEC with the expiry
+    (``idle_timeout`` seconds after the last turn).  A turn redacted on
+    another worker meanwhile keeps what it wrote, rather than being undone
+    by the values this one read before it.
+
+    ``client`` is an existing redis client to use instead of connecting to
+    ``url``.
+    """
+
+    def __init__(self, url=None, idle_timeout=900, prefix='session:', clock=time.monotonic, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('SESSION_STORE_URL=redis://... needs the redis package installed') from None
+            client = redis.Redis.from_url(url)
+        self.redis = client
+        self.idle_timeout = idle_timeout
+        self.prefix = prefix
+        self.clock = clock
+
+    def get(self, key):
+        state = _StoredState(self.clock())
+        stored = self.redis.hgetall(self.prefix + key)
+        if stored:
+            state.cvv_found = stored.get(b'cvv_found') == b'1'
+            state.customer_messages_searched = int(stored.get(b'customer_messages_searched', 0))
+            state.redacted = stored.get(b'redacted') == b'1'
+        state.stored = self._values(state)
+        return state
+
+    def save(self, key, state):
+        name = self.prefix + key
+        values = self._values(state)
+        stored = getattr(state, 'stored', None) or {}
+        pipe = self.redis.pipeline()
+        for field, value in values.items():
+            before = stored.get(field)
+            if value == before:
+                continue
+            if field == 'customer_messages_searched' and before is not None and value > before:
+                # Customer turns counted on other workers meanwhile still count
+                pipe.hincrby(name, field, value - before)
+            else:
+                pipe.hset(name, field, value)
+        pipe.expire(name, int(self.idle_timeout))
+        pipe.execute()
+        if isinstance(state, _StoredState):
+            state.stored = values
+
+    @staticmethod
+    def _values(state):
+        return {
+            'cvv_found': int(state.cvv_found),
+            'customer_messages_searched': state.customer_messages_searched,
+            'redacted': int(state.redacted),
+        }
+
+    def discard(self, key):
+        self.redis.delete(self.prefix + key)
+
+    def __contains__(self, key):
+        return bool(self.redis.exists(self.prefix + key))
+
+    def __len__(self):
+        # Held in Redis, not in this process
+        return 0
+
+
+def make_session_store(url, max_sessions=10000, idle_timeout=900):
+    if url and url.startswith('redis'):
+        return RedisSessionStore(url, idle_timeout=idle_timeout)
+    return SessionStore(max_sessions=max_sessions, idle_timeout=idle_timeout)
@@ -0,0 +1,92 @@
+import os
+import sys
+
+# The modules live at the top of the repo, as they do for the benchmarks;
+# the benchmarks' stub backend doubles as the tests' one
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+def _text(key):
+    # redis-py takes keys and members as str or bytes alike
+    return key.decode() if isinstance(key, bytes) else key
+
+
+class StubRedis:
+    """The few redis-py calls the Redis-backed stores make, on dicts in memory.
+
+    Values come back as bytes like redis-py's; a pipeline queues its calls
+    and runs them together on execute(), as MULTI/EXEC would.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.sorted_sets = {}
+        self.ttls = {}
+
+    def hgetall(self, name):
+        return {key.encode(): str(value).encode() for key, value in self.hashes.get(name, {}).items()}
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[_text(key)] = value
+
+    def hget(self, name, key):
+        value = self.hashes.get(name, {}).get(_text(key))
+        return None if value is None else str(value).encode()
+
+    def hdel(self, name, *keys):
+        fields = self.hashes.get(name, {})
+        return sum(fields.pop(_text(key), None) is not None for key in keys)
+
+    def hexists(self, name, key):
+        return _text(key) in self.hashes.get(name, {})
+
+    def hlen(self, name):
+        return len(self.hashes.get(name, {}))
+
+    def zadd(self, name, mapping):
+        self.sorted_sets.setdefault(name, {}).update((_text(member), score) for member, score in mapping.items())
+
+    def zrem(self, name, *members):
+        scores = self.sorted_sets.get(name, {})
+        return sum(scores.pop(_text(member), None) is not None for member in members)
+
+    def zrangebyscore(self, name, low, high, start=None, num=None):
+        low, high = float(low), float(high)
+        members = sorted((score, member) for member, score in self.sorted_sets.get(name, {}).items()
+                         if low <= score <= high)
+        members = [member.encode() for _, member in members]
+        return members[start:start + num] if num is not None else members
+
+    def hincrby(self, name, key, amount=1):
+        fields = self.hashes.setdefault(name, {})
+        fields[key] = int(fields.get(key, 0)) + amount
+        return fields[key]
+
+    def expire(self, name, seconds):
+        self.ttls[name] = seconds
+
+    def delete(self, name):
+        self.hashes.pop(name, None)
+        self.ttls.pop(name, None)
+
+    def exists(self, name):
+        return int(name in self.hashes)
+
+    def pipeline(self, transaction=True):
+        return StubPipeline(self)
+
+
+class StubPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+        return lambda *args, **kwargs: self.calls.append((method, args, kwargs))
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
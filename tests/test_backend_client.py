@@ -0,0 +1,106 @@
+import pytest
+
+from backend_client import BackendClient, BackendUnavailable, CircuitBreaker
+from stub_backend import StubBackend
+
+PROMPT = [{"role": "user", "content": "my cvv is 123"}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def stub():
+    stub = StubBackend().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def client(stub, clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+    client = BackendClient(stub.url, retries=0, max_in_flight=1, acquire_timeout=0.01, breaker=breaker)
+    yield client
+    client.close()
+
+
+def fail(client):
+    with pytest.raises(BackendUnavailable):
+        client.generate(PROMPT)
+
+
+def open_circuit(stub, client, clock):
+    stub.failure_rate = 1.0
+    fail(client)
+    fail(client)
+    assert client.breaker.state == CircuitBreaker.OPEN
+    clock.now += 10.0
+
+
+def test_success_keeps_it_closed(stub, client):
+    assert client.generate(PROMPT) == "my cvv is [CVV]"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.failures == 0
+
+
+def test_opens_after_consecutive_failures(stub, client):
+    stub.failure_rate = 1.0
+    fail(client)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    fail(client)
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_open_refuses_without_calling(stub, client, clock):
+    open_circuit(stub, client, clock)
+    clock.now -= 1.0
+    requests = stub.requests
+    with pytest.raises(BackendUnavailable, match='circuit open'):
+        client.generate(PROMPT)
+    assert stub.requests == requests
+
+
+def test_half_open_success_closes(stub, client, clock):
+    open_circuit(stub, client, clock)
+    stub.failure_rate = 0.0
+    assert client.generate(PROMPT) == "my cvv is [CVV]"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.failures == 0
+
+
+def test_half_open_failure_reopens(stub, client, clock):
+    open_circuit(stub, client, clock)
+    fail(client)
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.breaker.opened_at == clock.now
+    assert not client.breaker.allow()
+
+
+def test_half_open_trial_refused_in_flight_is_handed_back(stub, client, clock):
+    open_circuit(stub, client, clock)
+    stub.failure_rate = 0.0
+    client._in_flight.acquire()
+    with pytest.raises(BackendUnavailable, match='in flight'):
+        client.generate(PROMPT)
+    client._in_flight.release()
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.generate(PROMPT) == "my cvv is [CVV]"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_truncated_body_counts_as_failure(stub, client, clock):
+    stub.truncate = True
+    open_circuit(stub, client, clock)
+    fail(client)
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert not client.breaker.allow()
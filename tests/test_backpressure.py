@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('websocket', reason='needs websocket-client')
+socketio = pytest.importorskip('socketio')
+
+from bench_backpressure import flood  # noqa: E402
+from loadgen import free_port, start_server, wait_ready  # noqa: E402
+from stub_backend import StubBackend  # noqa: E402
+
+DURATION = 5.0
+FLOOD_RATE = 300.0
+# p99 of the calm call's round trips; a few ms here, generous for a loaded CI box
+BOUND = 0.5
+
+
+@pytest.fixture(scope='module')
+def server():
+    stub = StubBackend(latency=0.02).start()
+    port = free_port()
+    process = start_server('local_server', port, stub.url)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(url)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+        stub.stop()
+
+
+def calm_call(url, duration, interval=0.25):
+    # An agent and customer taking turns; seconds from each emit to its reply
+    answered = threading.Event()
+    clients = []
+    for role in ('agent', 'customer'):
+        client = socketio.Client(reconnection=False)
+        client.on('redacted_text', lambda data: answered.set())
+        client.connect(f'{url}?type={role}&call=calm', transports=['websocket'], wait_timeout=30)
+        clients.append(client)
+    lines = ["could you read me the security code on the back", "sure, it is 4 5 6"]
+    round_trips = []
+    started = time.monotonic()
+    while time.monotonic() - started < duration:
+        turn = len(round_trips) % 2
+        answered.clear()
+        sent = time.monotonic()
+        clients[turn].emit('text', {'text': lines[turn]})
+        assert answered.wait(5), 'no reply within 5 s'
+        round_trips.append(time.monotonic() - sent)
+        time.sleep(interval)
+    for client in clients:
+        client.disconnect()
+    return sorted(round_trips)
+
+
+def test_flood_is_throttled_and_others_stay_fast(server):
+    flooded = {}
+    flooder = threading.Thread(target=lambda: flooded.update(flood(server, FLOOD_RATE, DURATION)), daemon=True)
+    flooder.start()
+    round_trips = calm_call(server, DURATION)
+    flooder.join()
+
+    p99 = round_trips[int(len(round_trips) * 0.99) - 1]
+    assert p99 < BOUND, f'calm call p99 {p99 * 1000:.0f} ms next to the flood'
+    assert flooded['overloaded'] >= 1
+    # TEXT_RATE is 5 a second, and queued utterances are coalesced
+    assert flooded['answered'] < flooded['sent'] / 10
@@ -0,0 +1,11 @@
+from cache import ENTRY_OVERHEAD, RedactionCache
+
+
+def test_parsed_json_results_count_against_max_bytes():
+    cache = RedactionCache(max_bytes=64 * 1024)
+    answer = {'redacted': [{'role': 'customer', 'content': 'it is REDACTED ' * 50}]}
+    for number in range(1000):
+        cache.put('customer', f'utterance {number}', answer)
+    assert cache.size <= cache.max_bytes
+    assert cache.evictions > 0
+    assert cache.size // len(cache) > ENTRY_OVERHEAD + len('it is REDACTED ' * 50)
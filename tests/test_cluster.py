@@ -0,0 +1,42 @@
+from conftest import StubRedis
+from cluster import RedisClientRegistry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def registry(redis, clock):
+    return RedisClientRegistry(ttl=60, alive=lambda sid: True, clock=clock, wall_clock=clock, client=redis)
+
+
+def test_clients_of_a_dead_worker_are_reaped_by_the_others():
+    redis, clock = StubRedis(), Clock()
+    crashed, survivor = registry(redis, clock), registry(redis, clock)
+    crashed.admit('lost', {'type': 'agent', 'call': 'a'})
+    survivor.admit('quiet', {'type': 'customer', 'call': 'b'})
+    # The crashed worker never reaps again; the survivor does every few seconds
+    for _ in range(24):
+        clock.now += 5
+        survivor.reap()
+    assert survivor.get('lost') is None
+    assert survivor.get('quiet') == {'type': 'customer', 'call': 'b'}
+    assert len(survivor) == 1
+    assert survivor.orphans_reaped == 1
+
+
+def test_live_workers_keep_their_clients():
+    redis, clock = StubRedis(), Clock()
+    first, second = registry(redis, clock), registry(redis, clock)
+    first.admit('one', {'call': 'a'})
+    second.admit('two', {'call': 'a'})
+    for _ in range(100):
+        clock.now += 5
+        first.reap()
+        second.reap()
+    assert len(first) == 2
+    assert first.orphans_reaped == second.orphans_reaped == 0
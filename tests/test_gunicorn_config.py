@@ -0,0 +1,38 @@
+import os
+import runpy
+
+import pytest
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'gunicorn_config.py')
+
+
+def load(monkeypatch, **environ):
+    for name in ('WEB_CONCURRENCY', 'SOCKETIO_MESSAGE_QUEUE', 'SESSION_STORE_URL', 'CLIENT_REGISTRY_URL'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONFIG)
+
+
+def test_one_worker_needs_nothing(monkeypatch):
+    assert load(monkeypatch)['workers'] == 1
+
+
+@pytest.mark.parametrize('environ', [
+    {},
+    {'SOCKETIO_MESSAGE_QUEUE': 'local://'},
+    {'SOCKETIO_MESSAGE_QUEUE': 'amqp://broker'},
+    {'SOCKETIO_MESSAGE_QUEUE': 'redis://cache:6379/0', 'SESSION_STORE_URL': ''},
+])
+def test_workers_without_shared_state_are_refused(monkeypatch, environ):
+    with pytest.raises(SystemExit, match='WEB_CONCURRENCY=4'):
+        load(monkeypatch, WEB_CONCURRENCY='4', **environ)
+
+
+@pytest.mark.parametrize('environ', [
+    {'SOCKETIO_MESSAGE_QUEUE': 'redis://cache:6379/0'},
+    {'SOCKETIO_MESSAGE_QUEUE': 'amqp://broker', 'SESSION_STORE_URL': 'redis://cache:6379/1'},
+    {'SOCKETIO_MESSAGE_QUEUE': 'amqp://broker', 'CLIENT_REGISTRY_URL': 'redis://cache:6379/1'},
+])
+def test_workers_with_shared_state_start(monkeypatch, environ):
+    assert load(monkeypatch, WEB_CONCURRENCY='4', **environ)['workers'] == 4
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import redact_calls
+
+
+def turn(call_id, timestamp, role, text):
+    return {'call_id': call_id, 'timestamp': timestamp, 'channel_tag': role, 'transcript': text}
+
+
+def write_input(path):
+    bad = turn('call-1', 0, 'agent', "what is your cvv")
+    del bad['timestamp']
+    records = [
+        turn('call-0', 0, 'agent', "what is your cvv"),
+        turn('call-0', 1, 'customer', "it is 123"),
+        bad,
+        turn('call-2', 0, 'agent', "thanks for calling"),
+    ]
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+
+
+@pytest.mark.parametrize('processes', [0, 1])
+def test_bad_call_is_skipped(tmp_path, capsys, processes):
+    source, output = tmp_path / 'calls.jsonl', tmp_path / 'redacted.jsonl'
+    write_input(source)
+    argv = [str(source), '-o', str(output), '--processes', str(processes), '--chunksize', '1']
+    assert redact_calls.main(argv) == 0
+
+    calls = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [call['call_id'] for call in calls] == ['call-0', 'call-2']
+    assert calls[0]['redacted']
+    assert "call 'call-1': KeyError" in capsys.readouterr().err
+    # The skipped call still counts, so a resumed run does not redo it
+    assert json.loads((tmp_path / 'redacted.jsonl.checkpoint').read_text())['calls'] == 3
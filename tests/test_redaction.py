@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from redaction import redact_text
+
+GOLDEN = [
+    ("hello, how are you today", "hello, how are you today"),
+    ("my cvv is 123", "my cvv is [CVV]"),
+    ("the security code is four five six", "the security code is [CVV]"),
+    ("123 is on the back side", "[CVV] is on the back side"),
+    ("4111111111111111", "[VISA ENDING IN 1111]"),
+    ("card number 4111 1111 1111 1111 and 123", "card number [VISA ENDING IN 1111] and [CVV]"),
+    ("my amex is 371449635398431", "my amex is [AMEX ENDING IN 8431]"),
+    ("call me at (555) 123-4567", "call me at [PHONE]"),
+    ("my ssn is 123-45-6789", "my ssn is [NUMBER]"),
+    ("call 555-1234", "call [NUMBER]"),
+    ("my card starts 4111 1111", "my card starts [NUMBER]"),
+    ("the account is 12345678", "the account is [NUMBER]"),
+    ("see you at 3:52", "see you at 3:52"),
+    ("I have 2 kids", "I have 2 kids"),
+    # Three or four digits with no trigger on the line are not a CVV
+    ("I was born in 1985", "I was born in 1985"),
+    ("a 100 people", "a 100 people"),
+    ("it is 100 percent", "it is 100 percent"),
+    ("I paid 19.99 dollars", "I paid 19.99 dollars"),
+    ("version 1.2.3", "version 1.2.3"),
+    ("call 555.123.4567", "call [PHONE]"),
+    ("send it to john.doe@example.com", "send it to [EMAIL]"),
+]
+
+
+@pytest.mark.parametrize('text, expected', GOLDEN)
+def test_golden(text, expected):
+    assert redact_text(text) == expected
+
+
+@pytest.mark.parametrize('text', ['a' * 65536, ('at' + '.' * 5) * 8000], ids=['one-word', 'at-dots'])
+def test_long_input_without_at_is_fast(text):
+    # The email rule's backtracking once took seconds on these
+    started = time.perf_counter()
+    redact_text(text)
+    assert time.perf_counter() - started < 1.0
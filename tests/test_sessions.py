@@ -0,0 +1,43 @@
+from conftest import StubRedis
+from sessions import RedisSessionStore
+
+
+def store(redis):
+    return RedisSessionStore(idle_timeout=60, client=redis)
+
+
+def test_stale_read_does_not_undo_a_trigger():
+    # The customer's worker reads the call before the agent's worker arms it
+    redis = StubRedis()
+    customer, agent = store(redis), store(redis)
+    on_customer = customer.get('call')
+    on_agent = agent.get('call')
+    on_agent.cvv_found = True
+    agent.save('call', on_agent)
+    on_customer.customer_messages_searched += 1
+    customer.save('call', on_customer)
+
+    state = store(redis).get('call')
+    assert state.cvv_found
+    assert state.customer_messages_searched == 1
+    assert redis.ttls['session:call'] == 60
+
+
+def test_concurrent_customer_turns_both_count():
+    redis = StubRedis()
+    first, second = store(redis).get('call'), store(redis).get('call')
+    for state in (first, second):
+        state.customer_messages_searched += 1
+        store(redis).save('call', state)
+    assert store(redis).get('call').customer_messages_searched == 2
+
+
+def test_unchanged_state_only_renews_expiry():
+    redis = StubRedis()
+    sessions = store(redis)
+    state = sessions.get('call')
+    state.redacted = True
+    sessions.save('call', state)
+    redis.hset('session:call', 'cvv_found', 1)
+    sessions.save('call', state)
+    assert sessions.get('call').cvv_found
@@ -0,0 +1,110 @@
+import errno
+import os
+
+import pytest
+
+import transcripts
+from transcripts import TranscriptStore, WorkerTranscripts, open_worker_store, read_turns
+
+SEGMENT = 4096
+
+
+@pytest.fixture
+def disk(monkeypatch):
+    # A disk that runs out of room while .full is set
+    class Disk:
+        full = False
+
+    preallocate = transcripts._preallocate
+
+    def allocate(handle, size):
+        if Disk.full:
+            raise OSError(errno.ENOSPC, 'No space left on device')
+        preallocate(handle, size)
+
+    monkeypatch.setattr(transcripts, '_preallocate', allocate)
+    return Disk
+
+
+def fill_segment(store, call_id):
+    # Turns until the segment has no room for another, which then opens the next one
+    text = 'x' * 1000
+    store.append(call_id, 'agent', text)
+    while store._offset + 1100 <= SEGMENT:
+        store.append(call_id, 'agent', text)
+
+
+def test_segments_are_allocated(tmp_path):
+    store = TranscriptStore(str(tmp_path), segment_bytes=1 << 20)
+    path = transcripts._segment_path(str(tmp_path), store._active)
+    assert os.stat(path).st_blocks * 512 >= 1 << 20
+    store.close()
+
+
+def test_full_disk_drops_oldest_segment(tmp_path, disk, monkeypatch):
+    store = TranscriptStore(str(tmp_path), segment_bytes=SEGMENT)
+    fill_segment(store, 'old')
+    fill_segment(store, 'new')
+    disk.full = True
+    # Room for a segment comes back once the oldest one is gone
+    unlink = os.unlink
+
+    def freeing(path):
+        unlink(path)
+        disk.full = False
+
+    monkeypatch.setattr(os, 'unlink', freeing)
+    fill_segment(store, 'newer')
+    monkeypatch.undo()
+    assert store.last('old', 1) == []
+    assert store.last('new', 1)[0].call_id == 'new'
+    store.close()
+
+
+def test_full_disk_fails_append_until_room(tmp_path, disk):
+    store = TranscriptStore(str(tmp_path), segment_bytes=SEGMENT, max_segments=1)
+    fill_segment(store, 'call')
+    disk.full = True
+    with pytest.raises(OSError):
+        fill_segment(store, 'call')
+    assert store.segment_count == 0
+    with pytest.raises(OSError):
+        store.append('call', 'agent', 'still full')
+    disk.full = False
+    store.append('call', 'agent', 'room again')
+    assert [turn.text for turn in store.last('call', 5)] == ['room again']
+    store.close()
+
+
+def test_workers_get_their_own_store(tmp_path):
+    first = open_worker_store(str(tmp_path), clock=lambda: 1.0)
+    second = open_worker_store(str(tmp_path), clock=lambda: 2.0)
+    assert first.directory != second.directory
+    second.append('b', 'customer', 'second')
+    first.append('a', 'agent', 'first')
+    first.close()
+    second.close()
+    assert [turn.text for turn in read_turns(str(tmp_path))] == ['first', 'second']
+    # A restarted worker takes over a free slot and its turns
+    again = open_worker_store(str(tmp_path))
+    assert again.directory == first.directory
+    assert again.last('a', 1)[0].text == 'first'
+    again.close()
+
+
+def test_replay_reads_every_worker(tmp_path):
+    # The agent's turns are on one worker, the customer's on another
+    agent = open_worker_store(str(tmp_path), segment_bytes=SEGMENT, sync_every=1000)
+    customer = open_worker_store(str(tmp_path), segment_bytes=SEGMENT, sync_every=1000)
+    replay = WorkerTranscripts(str(tmp_path), customer)
+    agent.append('call', 'agent', 'what is your cvv', when=1.0)
+    customer.append('call', 'customer', 'it is REDACTED', when=2.0)
+    assert [turn.text for turn in replay.last('call', 5)] == ['what is your cvv', 'it is REDACTED']
+    # Later turns, across a sealed segment, and from a worker started since
+    fill_segment(agent, 'other')
+    agent.append('call', 'agent', 'thank you', when=3.0)
+    late = open_worker_store(str(tmp_path))
+    late.append('call', 'customer', 'bye', when=4.0)
+    assert [turn.text for turn in replay.last('call', 3)] == ['it is REDACTED', 'thank you', 'bye']
+    for store in (agent, customer, late):
+        store.close()
@@ -0,0 +1,516 @@
+import fcntl
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+
+# A record is its body's length and CRC-32, then the body: wall-clock time,
+# call id and sender lengths, and the call id, sender and text in UTF-8.
+# Segments are preallocated, so a zero length marks the end of the data.
+PREFIX = struct.Struct('<II')
+META = struct.Struct('<dHB')
+MAX_CALL_BYTES = 0xFFFF
+MAX_SENDER_BYTES = 0xFF
+SUFFIX = '.seg'
+LOCK_NAME = 'LOCK'
+WORKER_PREFIX = 'worker-'
+
+# Index entries pack the segment number above the record's offset in it
+_OFFSET_BITS = 40
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+Turn = namedtuple('Turn', 'time call_id sender text')
+
+
+class StoreLocked(OSError):
+    """Another process is already writing to this transcript directory."""
+
+
+def _encode(call_id, sender, text, when):
+    call = call_id.encode('utf-8', 'surrogatepass')
+    speaker = sender.encode('utf-8', 'surrogatepass')
+    if len(call) > MAX_CALL_BYTES or len(speaker) > MAX_SENDER_BYTES:
+        raise ValueError('call id or sender too long for a transcript record')
+    body = META.pack(when, len(call), len(speaker)) + call + speaker + text.encode('utf-8', 'surrogatepass')
+    return PREFIX.pack(len(body), zlib.crc32(body)) + body
+
+
+def _decode(buf, offset):
+    # The Turn at offset and where the next record starts; None at the end of
+    # the data or at a torn write
+    start = offset + PREFIX.size
+    if start > len(buf):
+        return None
+    size, crc = PREFIX.unpack_from(buf, offset)
+    end = start + size
+    if size < META.size or end > len(buf):
+        return None
+    body = buf[start:end]
+    if zlib.crc32(body) != crc:
+        return None
+    when, call_size, sender_size = META.unpack_from(body)
+    text_start = META.size + call_size + sender_size
+    return Turn(
+        when,
+        body[META.size:META.size + call_size].decode('utf-8', 'surrogatepass'),
+        body[META.size + call_size:text_start].decode('utf-8', 'surrogatepass'),
+        body[text_start:].decode('utf-8', 'surrogatepass'),
+    ), end
+
+
+def _segment_numbers(directory):
+    return sorted(int(name[:-len(SUFFIX)]) for name in os.listdir(directory)
+                  if name.endswith(SUFFIX) and name[:-len(SUFFIX)].isdigit())
+
+
+def _segment_path(directory, number):
+    return os.path.join(directory, f'{number:010d}{SUFFIX}')
+
+
+def _worker_directories(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(WORKER_PREFIX) and name[len(WORKER_PREFIX):].isdigit())
+
+
+def _preallocate(handle, size):
+    # Reserve the blocks up front: a store into a hole of a sparse mapping
+    # on a full disk is a SIGBUS, where this is an OSError
+    if hasattr(os, 'posix_fallocate'):
+        os.posix_fallocate(handle.fileno(), 0, size)
+    else:
+        handle.truncate(size)
+
+
+def _map_file(path):
+    with open(path, 'rb') as handle:
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_record(handle):
+    # Like _decode, from a file at its current position
+    head = handle.read(PREFIX.size)
+    if len(head) < PREFIX.size:
+        return None
+    size = PREFIX.unpack(head)[0]
+    if size < META.size:
+        return None
+    return _decode(head + handle.read(size), 0)
+
+
+def _index_position(index, call_id, number, offset):
+    positions = index.get(call_id)
+    if positions is None:
+        positions = index[call_id] = array('Q')
+    positions.append(number << _OFFSET_BITS | offset)
+
+
+def _prune(index, first_number):
+    # Drop positions in segments before first_number.  Positions are in
+    # append order, so each call loses a prefix
+    first = first_number << _OFFSET_BITS
+    for call_id, positions in list(index.items()):
+        expired = bisect_left(positions, first)
+        if expired == len(positions):
+            del index[call_id]
+        elif expired:
+            del positions[:expired]
+
+
+def read_turns(directory):
+    """Every Turn recorded in ``directory``, oldest first.
+
+    Read-only and lock-free, so it works on a copy of a production store
+    as well as on the directory of a running server (up to its last write).
+    The per-worker stores of open_worker_store are merged by time.
+    """
+    workers = _worker_directories(directory)
+    if workers:
+        yield from heapq.merge(*map(_read_segments, workers), key=lambda turn: turn.time)
+    yield from _read_segments(directory)
+
+
+def _read_segments(directory):
+    for number in _segment_numbers(directory):
+        path = _segment_path(directory, number)
+        if not os.path.getsize(path):
+            continue
+        buf = _map_file(path)
+        try:
+            offset = 0
+            while True:
+                record = _decode(buf, offset)
+                if record is None:
+                    break
+                turn, offset = record
+                yield turn
+        finally:
+            buf.close()
+
+
+class _Segment:
+    __slots__ = ('buf', 'last_time')
+
+    def __init__(self, buf, last_time):
+        self.buf = buf
+        self.last_time = last_time
+
+
+class TranscriptStore:
+    """Append-only log of redacted turns, in memory-mapped segment files.
+
+    Turns are written into the mapped active segment, which is preallocated
+    to ``segment_bytes``; a full one is truncated to its data, sealed and
+    remapped read-only.  Past ``max_segments`` segments, or once a sealed
+    segment's newest turn is older than ``max_age`` seconds, the oldest
+    segments are deleted.
+
+    Segments are allocated on disk when opened, so a full disk fails the
+    append that needed a new segment with OSError instead of faulting on a
+    later write.  The store then gives up its oldest sealed segments for
+    room, and if that is not enough, tries again on the next append.
+
+    ``append`` does not wait for the disk.  Every ``sync_every`` turns, or
+    whenever ``sync`` is called (the server does so on a timer), the dirty
+    pages are flushed with one msync, so a crash loses at most the turns
+    since.  Reopening the directory rebuilds the index from the segments
+    and cuts off a torn last record.
+
+    The in-memory index holds, per call id, an ``array('Q')`` of packed
+    (segment, offset) positions: 8 bytes per turn.  One process writes to a
+    directory at a time; a second one gets StoreLocked.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, max_segments=16, max_age=None,
+                 sync_every=256, clock=time.time):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.max_age = max_age
+        self.sync_every = sync_every
+        self.clock = clock
+        self.unsynced = 0
+        self.syncs = 0
+        self._index = {}
+        self._segments = OrderedDict()
+        self._active = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, LOCK_NAME), 'a')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise StoreLocked(f'{directory} is in use by another process') from None
+        numbers = _segment_numbers(directory)
+        for number in numbers:
+            self._recover(number)
+        self._open_segment(numbers[-1] + 1 if numbers else 1, segment_bytes)
+        self._enforce_retention(self.clock())
+
+    def _recover(self, number):
+        path = _segment_path(self.directory, number)
+        size = os.path.getsize(path)
+        buf = _map_file(path) if size else None
+        offset = 0
+        last_time = 0.0
+        while buf is not None:
+            record = _decode(buf, offset)
+            if record is None:
+                break
+            turn, end = record
+            _index_position(self._index, turn.call_id, number, offset)
+            last_time = turn.time
+            offset = end
+        if offset < size:
+            # Preallocated space of a segment that was never sealed, or a torn write
+            buf.close()
+            os.truncate(path, offset)
+            buf = _map_file(path) if offset else None
+        if buf is None:
+            os.unlink(path)
+            return
+        self._segments[number] = _Segment(buf, last_time)
+
+    def _open_segment(self, number, size):
+        path = _segment_path(self.directory, number)
+        handle = open(path, 'w+b')
+        try:
+            _preallocate(handle, size)
+            buf = mmap.mmap(handle.fileno(), size)
+        except OSError:
+            handle.close()
+            os.unlink(path)
+            raise
+        self._active = number
+        self._file = handle
+        self._segments[number] = _Segment(buf, 0.0)
+        self._offset = 0
+        self._synced = 0
+        # Make the new file itself durable
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def _rotate(self, size, now):
+        # Seal the active segment and open the next one, dropping the oldest
+        # sealed segments while the disk has no room for it
+        number = self._next_number = self._active + 1
+        self._seal()
+        self._active = None
+        self._offset = 0
+        while True:
+            try:
+                self._open_segment(number, size)
+                break
+            except OSError:
+                if not self._drop_oldest():
+                    raise
+        self._enforce_retention(now)
+
+    def _drop_oldest(self):
+        if not self._segments:
+            return False
+        number, segment = self._segments.popitem(last=False)
+        segment.buf.close()
+        os.unlink(_segment_path(self.directory, number))
+        self._prune_index()
+        return True
+
+    def _seal(self):
+        if self._active is None:
+            return
+        self._sync()
+        segment = self._segments[self._active]
+        segment.buf.close()
+        self._file.truncate(self._offset)
+        self._file.close()
+        path = _segment_path(self.directory, self._active)
+        if self._offset:
+            segment.buf = _map_file(path)
+        else:
+            del self._segments[self._active]
+            os.unlink(path)
+
+    def append(self, call_id, sender, text, when=None):
+        if when is None:
+            when = self.clock()
+        record = _encode(call_id, sender, text, when)
+        with self._lock:
+            if self._active is None:
+                # The disk was full at the last rotation
+                self._open_segment(self._next_number, max(self.segment_bytes, len(record)))
+            segment = self._segments[self._active]
+            if self._offset + len(record) > len(segment.buf):
+                self._rotate(max(self.segment_bytes, len(record)), when)
+                segment = self._segments[self._active]
+            offset = self._offset
+            segment.buf[offset:offset + len(record)] = record
+            segment.last_time = when
+            self._offset += len(record)
+            _index_position(self._index, call_id, self._active, offset)
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every:
+                self._sync()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if not self.unsynced or self._active is None:
+            return
+        start = self._synced - self._synced % mmap.ALLOCATIONGRANULARITY
+        self._segments[self._active].buf.flush(start, self._offset - start)
+        self._synced = self._offset
+        self.unsynced = 0
+        self.syncs += 1
+
+    def enforce_retention(self):
+        with self._lock:
+            self._enforce_retention(self.clock())
+
+    def _enforce_retention(self, now):
+        dropped = False
+        for number, segment in list(self._segments.items()):
+            if number == self._active:
+                break
+            too_many = len(self._segments) > self.max_segments
+            too_old = self.max_age is not None and segment.last_time < now - self.max_age
+            if not (too_many or too_old):
+                break
+            segment.buf.close()
+            del self._segments[number]
+            os.unlink(_segment_path(self.directory, number))
+            dropped = True
+        if dropped:
+            self._prune_index()
+
+    def _prune_index(self):
+        if not self._segments:
+            self._index.clear()
+            return
+        _prune(self._index, next(iter(self._segments)))
+
+    def last(self, call_id, count):
+        """The call's latest ``count`` turns, oldest first."""
+        with self._lock:
+            positions = self._index.get(call_id)
+            if not positions or count <= 0:
+                return []
+            turns = []
+            for position in positions[-count:]:
+                record = _decode(self._segments[position >> _OFFSET_BITS].buf, position & _OFFSET_MASK)
+                if record is not None:
+                    turns.append(record[0])
+            return turns
+
+    def close(self):
+        with self._lock:
+            self._seal()
+            for segment in self._segments.values():
+                segment.buf.close()
+            self._segments.clear()
+            self._lock_file.close()
+
+    @property
+    def segment_count(self):
+        return len(self._segments)
+
+    @property
+    def size(self):
+        # Bytes of data on disk, not counting the active segment's preallocation
+        return sum(len(segment.buf) for number, segment in self._segments.items()
+                   if number != self._active) + self._offset
+
+    def __len__(self):
+        return len(self._index)
+
+
+class TranscriptReader:
+    """Read-only view of a TranscriptStore that another process writes to.
+
+    It keeps an index of its own, brought up to date on each ``last`` by
+    reading only what was appended since: a segment with a later one after
+    it is sealed and read once, and the active one is read up to its first
+    record that is missing or not completely written yet.  The files are
+    read rather than mapped, since the writer truncates a segment when it
+    seals it.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._index = {}
+        self._read = {}  # segment number -> offset read up to
+        self._sealed = set()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            numbers = _segment_numbers(self.directory)
+        except FileNotFoundError:
+            numbers = []
+        first = numbers[0] if numbers else float('inf')
+        dropped = [number for number in self._read if number < first]
+        if dropped:
+            # Removed by the writer's retention
+            for number in dropped:
+                del self._read[number]
+                self._sealed.discard(number)
+            if numbers:
+                _prune(self._index, first)
+            else:
+                self._index.clear()
+        for position, number in enumerate(numbers):
+            if number in self._sealed:
+                continue
+            try:
+                self._read[number] = self._scan(number, self._read.get(number, 0))
+            except FileNotFoundError:
+                continue
+            if position + 1 < len(numbers):
+                self._sealed.add(number)
+
+    def _scan(self, number, offset):
+        with open(_segment_path(self.directory, number), 'rb') as handle:
+            handle.seek(offset)
+            while True:
+                record = _read_record(handle)
+                if record is None:
+                    return offset
+                turn, size = record
+                _index_position(self._index, turn.call_id, number, offset)
+                offset += size
+
+    def last(self, call_id, count):
+        """The call's latest ``count`` turns written so far, oldest first."""
+        with self._lock:
+            self._refresh()
+            positions = self._index.get(call_id)
+            if not positions or count <= 0:
+                return []
+            turns = []
+            for position in positions[-count:]:
+                try:
+                    with open(_segment_path(self.directory, position >> _OFFSET_BITS), 'rb') as handle:
+                        handle.seek(position & _OFFSET_MASK)
+                        record = _read_record(handle)
+                except FileNotFoundError:
+                    continue
+                if record is not None:
+                    turns.append(record[0])
+            return turns
+
+
+class WorkerTranscripts:
+    """Replay across all the ``worker-N`` stores of one directory.
+
+    ``store`` is this process's own (from open_worker_store); the other
+    workers' stores are followed with a TranscriptReader each, picked up as
+    they appear.  So a socket replays its call's turns whichever workers
+    the other sockets of the call were on.
+    """
+
+    def __init__(self, directory, store):
+        self.directory = directory
+        self.store = store
+        self._readers = {}
+
+    def last(self, call_id, count):
+        """The call's latest ``count`` turns over every worker, oldest first."""
+        if count <= 0:
+            return []
+        for path in _worker_directories(self.directory):
+            if path != self.store.directory and path not in self._readers:
+                self._readers[path] = TranscriptReader(path)
+        turns = self.store.last(call_id, count)
+        for reader in self._readers.values():
+            turns += reader.last(call_id, count)
+        turns.sort(key=lambda turn: turn.time)
+        return turns[-count:]
+
+
+def open_worker_store(directory, **options):
+    """A TranscriptStore in the first free ``worker-N`` subdirectory of ``directory``.
+
+    For server processes sharing one directory: each gets a store of its
+    own, and a restarted worker takes over the turns of the one it replaces.
+    """
+    os.makedirs(directory, exist_ok=True)
+    number = 0
+    while True:
+        try:
+            return TranscriptStore(os.path.join(directory, f'{WORKER_PREFIX}{number}'), **options)
+        except StoreLocked:
+            number += 1
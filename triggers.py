@@ -0,0 +1,214 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get('TRIGGERS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'triggers.txt'))
+
+
+def tokenize(text):
+    """(token, start, end) for every lowercased alphanumeric run."""
+    return [(match.group(), match.start(), match.end()) for match in _TOKEN.finditer(text.lower())]
+
+
+class TriggerMatch:
+    """A trigger phrase found in a text, with re.Match-style offsets."""
+
+    __slots__ = ('phrase', '_start', '_end')
+
+    def __init__(self, phrase, start, end):
+        self.phrase = phrase
+        self._start = start
+        self._end = end
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+
+class TriggerIndex:
+    """Aho-Corasick automaton over the words of a set of trigger phrases.
+
+    A phrase is a sequence of words with optional ``*`` wildcards (any
+    number of words).  Each wildcard-free segment is a keyword in the
+    automaton, so one left-to-right pass over the words of an utterance
+    finds every phrase at once, however many there are.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = []
+        self._segments = []  # per phrase: number of segments
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase in phrases:
+            self._add(phrase)
+        self._build_failure_links()
+        self.first_words = frozenset(
+            phrase.split()[0] for phrase in self.phrases if phrase.split()[0] != '*'
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as handle:
+            return cls(line for line in handle if line.strip() and not line.lstrip().startswith('#'))
+
+    def _add(self, phrase):
+        words = []
+        for word in phrase.lower().split():
+            words.extend(['*'] if word == '*' else _TOKEN.findall(word))
+        segments = []
+        current = []
+        for word in words + ['*']:
+            if word == '*':
+                if current:
+                    segments.append(current)
+                current = []
+            else:
+                current.append(word)
+        if not segments:
+            return
+        phrase_id = len(self.phrases)
+        self.phrases.append(' '.join(words))
+        self._segments.append(len(segments))
+        for index, segment in enumerate(segments):
+            state = 0
+            for word in segment:
+                state = self._goto[state].setdefault(word, len(self._goto))
+                if state == len(self._goto):
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+            self._out[state].append((phrase_id, index, len(segment)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, target in self._goto[state].items():
+                queue.append(target)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[target] = self._goto[fail].get(word, 0)
+                self._out[target] = self._out[target] + self._out[self._fail[target]]
+
+    def _matches(self, tokens):
+        """Yield (phrase_id, first_token, last_token) for complete phrases, by end token."""
+        goto, fail, out, segments = self._goto, self._fail, self._out, self._segments
+        progress = {}  # phrase_id -> (next segment, first token, last token so far)
+        state = 0
+        for position, (word, _, _) in enumerate(tokens):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for phrase_id, index, length in out[state]:
+                start = position - length + 1
+                if segments[phrase_id] == 1:
+                    yield phrase_id, start, position
+                    continue
+                done = progress.get(phrase_id)
+                if index == 0:
+                    if done is None:
+                        progress[phrase_id] = (1, start, position)
+                elif done is not None and done[0] == index and start > done[2]:
+                    if index + 1 == segments[phrase_id]:
+                        del progress[phrase_id]
+                        yield phrase_id, done[1], position
+                    else:
+                        progress[phrase_id] = (index + 1, done[1], position)
+
+    def has_trigger(self, text):
+        for _ in self._matches(tokenize(text)):
+            return True
+        return False
+
+    def find(self, text):
+        tokens = tokenize(text)
+        return [
+            TriggerMatch(self.phrases[phrase_id], tokens[start][1], tokens[end][2])
+            for phrase_id, start, end in self._matches(tokens)
+        ]
+
+
+class TriggerDictionary:
+    """The current TriggerIndex for a phrase file, rebuilt when the file changes.
+
+    The file is read by ``load`` or on first use, then its mtime is checked
+    at most every ``check_interval`` seconds; a file that fails to reload
+    keeps the previous index.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, check_interval=5.0, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._index = None
+        self._checked = clock()
+
+    @property
+    def index(self):
+        if self._index is None:
+            self.load()
+        now = self.clock()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            self.reload()
+        return self._index
+
+    def load(self):
+        """Read the phrase file now; raises OSError or UnicodeDecodeError if it cannot be."""
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime
+            self._index = TriggerIndex.from_file(self.path)
+            self._mtime = mtime
+            self._checked = self.clock()
+
+    def reload(self):
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime == self._mtime:
+                    return False
+                self._index = TriggerIndex.from_file(self.path)
+                self._mtime = mtime
+            except (OSError, UnicodeDecodeError) as exc:
+                logger.warning('Could not reload trigger phrases from %s: %s', self.path, exc)
+                return False
+        return True
+
+    def has_trigger(self, text):
+        return self.index.has_trigger(text)
+
+    def find(self, text):
+        return self.index.find(text)
+
+    def first_words(self):
+        return self.index.first_words
+
+    @property
+    def phrases(self):
+        return self.index.phrases
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_dictionary():
+    """Process-wide TriggerDictionary for triggers.txt (or $TRIGGERS_FILE)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TriggerDictionary()
+        return _default
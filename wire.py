@@ -0,0 +1,110 @@
+from urllib.parse import parse_qs
+
+import socketio
+from socketio import packet
+
+try:
+    from socketio.msgpack_packet import MsgPackPacket
+except ImportError:  # msgpack is optional; everyone gets JSON without it
+    MsgPackPacket = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+# A binary packet type only means "has attachments" in the JSON encoding
+_PLAIN_TYPES = {packet.BINARY_EVENT: packet.EVENT, packet.BINARY_ACK: packet.ACK}
+
+
+def negotiate(requested):
+    # The ?codec= query param of the connection; JSON unless msgpack is both asked for and installed
+    if requested == MSGPACK and MsgPackPacket is not None:
+        return MSGPACK
+    return JSON
+
+
+def codec_room(room, codec):
+    # JSON clients stay in the call's room itself, so older code emitting to it still reaches them
+    return room if codec == JSON else f'{room}#{codec}'
+
+
+# Event payloads.  JSON clients get the original schema; msgpack clients a
+# lean one without the field names and the "sender: " prefix.
+
+def redacted_text(codec, text):
+    return text if codec == MSGPACK else {'redacted_text': text}
+
+
+def chat_message(codec, sender_type, text):
+    if codec == MSGPACK:
+        return [sender_type, text]
+    return {'sender_type': sender_type, 'message': f"{sender_type}: {text}"}
+
+
+def redacted_interim(codec, sender_type, offset, text):
+    if codec == MSGPACK:
+        return [sender_type, offset, text]
+    return {'sender_type': sender_type, 'offset': offset, 'text': text}
+
+
+def incoming_text(data):
+    # `text` / `interim_text` payloads: {'text': ...} from JSON clients, the bare string from msgpack ones
+    if isinstance(data, str):
+        return data
+    return (data or {}).get('text', '')
+
+
+class CodecServer(socketio.Server):
+    """socketio.Server that speaks msgpack to the Engine.IO sessions that asked for it.
+
+    python-socketio picks one serializer for the whole server; here every
+    packet to or from a session listed in ``msgpack_sids`` goes through
+    MsgPackPacket instead (the format of socket.io-msgpack-parser) and
+    everything else stays JSON.  Use ``enable_msgpack`` on the server that
+    Flask-SocketIO built.
+    """
+
+    def _handle_eio_connect(self, eio_sid, environ):
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        if negotiate(query.get('codec', [JSON])[0]) == MSGPACK:
+            self.msgpack_sids.add(eio_sid)
+        return super()._handle_eio_connect(eio_sid, environ)
+
+    def _handle_eio_message(self, eio_sid, data):
+        if eio_sid not in self.msgpack_sids:
+            return super()._handle_eio_message(eio_sid, data)
+        pkt = MsgPackPacket(encoded_packet=data)
+        if pkt.packet_type == packet.CONNECT:
+            self._handle_connect(eio_sid, pkt.namespace, pkt.data)
+        elif pkt.packet_type == packet.DISCONNECT:
+            self._handle_disconnect(eio_sid, pkt.namespace)
+        elif pkt.packet_type in (packet.EVENT, packet.BINARY_EVENT):
+            self._handle_event(eio_sid, pkt.namespace, pkt.id, pkt.data)
+        elif pkt.packet_type in (packet.ACK, packet.BINARY_ACK):
+            self._handle_ack(eio_sid, pkt.namespace, pkt.id, pkt.data)
+        else:
+            raise ValueError('Unknown packet type.')
+
+    def _send_packet(self, eio_sid, pkt):
+        if eio_sid in self.msgpack_sids:
+            pkt = MsgPackPacket(_PLAIN_TYPES.get(pkt.packet_type, pkt.packet_type), data=pkt.data,
+                                namespace=pkt.namespace, id=pkt.id, binary=False)
+        super()._send_packet(eio_sid, pkt)
+
+    def _handle_eio_disconnect(self, eio_sid):
+        super()._handle_eio_disconnect(eio_sid)
+        self.msgpack_sids.discard(eio_sid)
+
+
+def enable_msgpack(server):
+    """Turn Flask-SocketIO's socketio.Server into a CodecServer, in place.
+
+    Flask-SocketIO constructs the server itself and offers no way to pick
+    its class; nothing changes for JSON clients.
+    """
+    server.__class__ = CodecServer
+    server.msgpack_sids = set()
+    # Engine.IO holds the handlers bound when the server was built
+    server.eio.on('connect', server._handle_eio_connect)
+    server.eio.on('message', server._handle_eio_message)
+    server.eio.on('disconnect', server._handle_eio_disconnect)
+    return server